@@ -1,16 +1,65 @@
-from passlib.context import CryptContext
+import os
+import time
+import uuid
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
 from jose import jwt, JWTError
 from datetime import datetime, timedelta
-from fastapi import Depends, HTTPException, Security
+from dotenv import load_dotenv
+from fastapi import HTTPException, Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from database import SessionLocal
-from sqlalchemy.orm import Session
+from database import SessionLocal, AsyncSessionLocal
+from sqlalchemy import event, inspect, select, update, delete, false
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
 from models.user import User
+from models.revoked_token import RevokedToken
+from utils.ttl_cache import TTLCache
+from utils import password_hashing
+
+load_dotenv()
 
 SECRET_KEY = "MY_SUPER_SECRET_KEY"
 ALGORITHM = "HS256"
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Default token lifetime
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+
+# Cache of verified tokens -> principals, so repeated requests skip the HMAC check and the
+# denylist lookup. Revocations live in the database (users.token_version, revoked_tokens) and
+# are shared by every worker; a logout in another worker is seen within this TTL.
+# Entries never outlive the token's own `exp`.
+TOKEN_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_TTL_SECONDS", 60))
+TOKEN_CACHE_MAX_SIZE = int(os.getenv("TOKEN_CACHE_MAX_SIZE", 4096))
+
+token_cache = TTLCache(max_size=TOKEN_CACHE_MAX_SIZE, ttl=TOKEN_CACHE_TTL_SECONDS)
+
+# Cache of user id -> current token_version, shared by all tokens of a user. A cached token is
+# only accepted while its user's entry is present and matches, so dropping the entry (on a
+# committed revoke_user_tokens / rename / delete in this worker) re-checks every token of that
+# user at once; other workers see the change within this TTL.
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", 60))
+AUTH_CACHE_MAX_SIZE = int(os.getenv("AUTH_CACHE_MAX_SIZE", 1024))
+
+user_cache = TTLCache(max_size=AUTH_CACHE_MAX_SIZE, ttl=AUTH_CACHE_TTL_SECONDS)
+
+# Tokens issued before they carried `uid` are resolved by their username (`sub`) instead.
+# Set to false once those tokens have expired to accept only tokens with a user id.
+AUTH_ACCEPT_TOKENS_WITHOUT_UID = os.getenv("AUTH_ACCEPT_TOKENS_WITHOUT_UID", "true").lower() == "true"
+
+pwd_context = password_hashing.pwd_context
+
+# bcrypt runs in its own processes so a login burst cannot starve request threads.
+# At most PASSWORD_HASH_MAX_PENDING hashes may be queued; beyond that requests get 503.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 64))
+
+_hash_executor = None
+_hash_slots = threading.BoundedSemaphore(PASSWORD_HASH_MAX_PENDING)
 
 # ✅ JWT Bearer token scheme
 bearer_scheme = HTTPBearer()
@@ -23,31 +72,189 @@ def get_db():
         db.close()
 
 def hash_password(password: str):
-    return pwd_context.hash(password)
+    return password_hashing.hash_password(password)
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hashing.verify_password(plain_password, hashed_password)
 
-def create_jwt_token(data: dict, expires_in: int = 30):
+def _get_hash_executor() -> ProcessPoolExecutor:
+    global _hash_executor
+    if _hash_executor is None:
+        # spawn: forking a process that runs threads (scheduler, dispatcher) is unsafe
+        _hash_executor = ProcessPoolExecutor(
+            max_workers=PASSWORD_HASH_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _hash_executor
+
+async def _run_in_hash_pool(fn, *args):
+    if not _hash_slots.acquire(blocking=False):
+        raise HTTPException(status_code=503, detail="Too many authentication requests, retry shortly")
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_hash_executor(), fn, *args)
+    finally:
+        _hash_slots.release()
+
+async def hash_password_async(password: str) -> str:
+    return await _run_in_hash_pool(password_hashing.hash_password, password)
+
+async def verify_and_update_password_async(plain_password, hashed_password):
+    """Returns (valid, new_hash); new_hash is set when the stored hash uses an outdated cost."""
+    return await _run_in_hash_pool(password_hashing.verify_and_update, plain_password, hashed_password)
+
+@dataclass(frozen=True)
+class TokenPrincipal:
+    """Identity carried by a verified token; enough to authorize without loading the User row."""
+    user_id: int | None
+    username: str
+    jti: str | None
+    issued_at: float | None
+    expires_at: float
+    token_version: int = 0
+
+def create_jwt_token(data: dict, expires_in: int = ACCESS_TOKEN_EXPIRE_MINUTES):
+    """
+    Sign a token for `data["username"]`. Pass `uid` (user id) and `ver` (the user's
+    token_version) as well so it can be checked without a lookup by username
+    (see get_current_principal). Every token gets a `jti` and `iat` so it can be revoked.
+    """
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=expires_in)
-    to_encode.update({"exp": expire, "sub": data["username"]})
+    to_encode.update({
+        "exp": expire,
+        "sub": data["username"],
+        "iat": time.time(),
+        "jti": uuid.uuid4().hex,
+    })
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-# 🔥 Get current user from JWT token
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Security(bearer_scheme),
-    db: Session = Depends(get_db)
-):
-    token = credentials.credentials
+def decode_token(token: str) -> TokenPrincipal:
+    """Verify a token's signature and expiry and return its claims (revocation is not checked here)."""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise HTTPException(status_code=401, detail="Invalid credentials")
-        user = db.query(User).filter(User.username == username).first()
-        if not user:
-            raise HTTPException(status_code=401, detail="User not found")
-        return user
     except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
\ No newline at end of file
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    username = payload.get("sub")
+    if username is None:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    return TokenPrincipal(
+        user_id=payload.get("uid"),
+        username=username,
+        jti=payload.get("jti"),
+        issued_at=payload.get("iat"),
+        expires_at=payload["exp"],
+        token_version=payload.get("ver", 0),
+    )
+
+async def _check_revocation(principal: TokenPrincipal) -> TokenPrincipal:
+    """
+    One query against the shared revocation state: the user still exists, the token's
+    version is the user's current token_version, and its jti is not on the denylist.
+    Tokens without `uid` are looked up by username. Returns the principal with its user id.
+    """
+    denylisted = (
+        select(RevokedToken.jti).where(RevokedToken.jti == principal.jti).exists()
+        if principal.jti else false()
+    )
+    stmt = select(User.id, User.token_version, denylisted)
+    if principal.user_id is not None:
+        stmt = stmt.where(User.id == principal.user_id)
+    else:
+        stmt = stmt.where(User.username == principal.username)
+
+    async with AsyncSessionLocal() as db:
+        row = (await db.execute(stmt)).first()
+
+    if row is None:
+        raise HTTPException(status_code=401, detail="User not found")
+    user_id, token_version, is_denylisted = row
+    if is_denylisted or principal.token_version != token_version:
+        raise HTTPException(status_code=401, detail="Token has been revoked")
+    return replace(principal, user_id=user_id)
+
+# 🔑 Identity from the token: at most one DB query per token and cache TTL
+async def get_current_principal(
+    credentials: HTTPAuthorizationCredentials = Security(bearer_scheme)
+) -> TokenPrincipal:
+    token = credentials.credentials
+    principal = token_cache.get(token)
+    if principal is not None:
+        if principal.expires_at > time.time() and user_cache.get(principal.user_id) == principal.token_version:
+            return principal
+        token_cache.invalidate(token)
+
+    principal = decode_token(token)
+    if principal.user_id is None and not AUTH_ACCEPT_TOKENS_WITHOUT_UID:
+        # Issued before tokens carried the user id; the client has to log in again
+        raise HTTPException(status_code=401, detail="Token does not carry a user id, please log in again")
+
+    principal = await _check_revocation(principal)
+    user_cache.set(principal.user_id, principal.token_version)
+    token_cache.set(token, principal, ttl=min(TOKEN_CACHE_TTL_SECONDS, principal.expires_at - time.time()))
+    return principal
+
+def get_auth_cache_stats() -> dict:
+    """Size and hit / miss / eviction counters of the token and user caches."""
+    return {"tokens": token_cache.stats(), "users": user_cache.stats()}
+
+async def revoke_token(token: str, principal: TokenPrincipal, db: AsyncSession):
+    """
+    Reject this token from now on, in every worker (e.g. logout).
+    Tokens issued before they carried a `jti` cannot be told apart: all of the user's tokens are revoked.
+    """
+    if principal.jti:
+        await db.execute(
+            insert(RevokedToken)
+            .values(jti=principal.jti, expires_at=datetime.utcfromtimestamp(principal.expires_at))
+            .on_conflict_do_nothing(index_elements=[RevokedToken.jti])
+        )
+    else:
+        await db.execute(
+            update(User).where(User.id == principal.user_id).values(token_version=User.token_version + 1)
+        )
+        _revoke_on_commit(db.sync_session, principal.user_id)
+    await db.commit()
+    token_cache.invalidate(token)
+
+def revoke_user_tokens(user: User):
+    """
+    Reject every token issued to this user so far (e.g. password change), in every worker.
+    Part of the caller's transaction: takes effect when it commits, and this worker's cached
+    entry for the user is dropped then.
+    """
+    user.token_version = User.token_version + 1
+    session = object_session(user)
+    if session is not None:
+        _revoke_on_commit(session, user.id)
+
+def _revoke_on_commit(session: Session, user_id: int):
+    session.info.setdefault("revoked_user_ids", set()).add(user_id)
+
+def purge_expired_revocations(db: Session) -> int:
+    """Delete denylist entries whose token has expired anyway. Returns the number of rows removed."""
+    result = db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= datetime.utcnow()))
+    db.commit()
+    return result.rowcount
+
+# 🔄 Renamed users: outstanding tokens carry the old username, so bump the token version in the
+# same flush. Renamed and deleted users are remembered until the transaction ends.
+# (A password change endpoint should call revoke_user_tokens too; a login re-hash should not.)
+@event.listens_for(Session, "before_flush")
+def _revoke_renamed_or_deleted_users(session, flush_context, instances):
+    for obj in session.dirty:
+        if isinstance(obj, User) and inspect(obj).attrs.username.history.deleted:
+            revoke_user_tokens(obj)
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            _revoke_on_commit(session, obj.id)
+
+# 🚫 Only once committed: drop this worker's cached entries of those users right away
+# (other workers see the committed token_version / missing row within AUTH_CACHE_TTL_SECONDS)
+@event.listens_for(Session, "after_commit")
+def _apply_user_revocations(session):
+    for user_id in session.info.pop("revoked_user_ids", ()):
+        user_cache.invalidate(user_id)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_user_revocations(session):
+    session.info.pop("revoked_user_ids", None)
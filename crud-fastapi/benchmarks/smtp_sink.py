@@ -0,0 +1,97 @@
+# benchmarks/smtp_sink.py
+"""
+Local stand-in SMTP server that accepts and discards every message.
+
+Point the app at it to benchmark email throughput offline:
+
+    python -m benchmarks.smtp_sink --port 1025
+    SMTP_SERVER=127.0.0.1 SMTP_PORT=1025 SMTP_USE_TLS=false SMTP_USE_AUTH=false uvicorn main:app
+
+Only the commands smtplib needs for a plain (no TLS, no auth) session are implemented.
+"""
+import argparse
+import socketserver
+import threading
+
+
+class SinkStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connections = 0
+        self.messages = 0
+
+    def add_connection(self):
+        with self._lock:
+            self.connections += 1
+
+    def add_message(self):
+        with self._lock:
+            self.messages += 1
+
+
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+
+    def reply(self, line: str):
+        self.wfile.write((line + "\r\n").encode())
+
+    def handle(self):
+        self.server.stats.add_connection()
+        self.reply("220 smtp-sink ready")
+
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip().upper()
+
+            if command.startswith("EHLO"):
+                self.wfile.write(b"250-smtp-sink\r\n250-8BITMIME\r\n250 SIZE 52428800\r\n")
+            elif command.startswith("HELO"):
+                self.reply("250 smtp-sink")
+            elif command.startswith(("MAIL", "RCPT", "RSET", "NOOP")):
+                self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                # Swallow the message body up to the terminating "."
+                while True:
+                    data_line = self.rfile.readline()
+                    if not data_line or data_line in (b".\r\n", b".\n"):
+                        break
+                self.server.stats.add_message()
+                self.reply("250 OK: queued")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class SMTPSinkServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 1025):
+        super().__init__((host, port), SMTPSinkHandler)
+        self.stats = SinkStats()
+
+    def start_in_background(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, name="smtp-sink", daemon=True)
+        thread.start()
+        return thread
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Discard-all SMTP server for offline benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    args = parser.parse_args()
+
+    server = SMTPSinkServer(args.host, args.port)
+    print(f"SMTP sink listening on {args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"connections={server.stats.connections} messages={server.stats.messages}")
+        server.server_close()
@@ -0,0 +1,51 @@
+# benchmarks/smtp_throughput.py
+"""
+Compare one SMTP connection per message with a reused SMTPSession, against the local sink.
+
+    python -m benchmarks.smtp_throughput --messages 500
+"""
+import argparse
+import os
+import time
+
+from benchmarks.smtp_sink import SMTPSinkServer
+
+
+def run(messages: int, port: int):
+    server = SMTPSinkServer(port=port)
+    server.start_in_background()
+
+    # Must be set before utils.email_sender reads its configuration
+    os.environ.update({
+        "SMTP_SERVER": "127.0.0.1",
+        "SMTP_PORT": str(port),
+        "SMTP_USE_TLS": "false",
+        "SMTP_USE_AUTH": "false",
+    })
+    from utils.email_sender import EmailSender, SMTPSession
+
+    start = time.perf_counter()
+    for i in range(messages):
+        EmailSender.send_email("bench@example.com", f"bench {i}", "body")
+    per_message = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with SMTPSession() as smtp:
+        for i in range(messages):
+            EmailSender.send_email("bench@example.com", f"bench {i}", "body", smtp=smtp)
+    reused = time.perf_counter() - start
+
+    server.shutdown()
+    server.server_close()
+
+    print(f"messages={messages} sink_connections={server.stats.connections} sink_messages={server.stats.messages}")
+    print(f"connection per message: {messages / per_message:8.1f} msg/s")
+    print(f"reused SMTPSession:     {messages / reused:8.1f} msg/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--port", type=int, default=1025)
+    args = parser.parse_args()
+    run(args.messages, args.port)
@@ -0,0 +1,140 @@
+# benchmarks/stub_apis.py
+"""
+Local stand-ins for the external HTTP APIs, for offline benchmarks:
+- LiteAPI:  GET /data/hotel?hotelId=...            -> {"data": {...}}
+- Task API: POST /task/api/api/auth/users          -> {"token": "<jwt>"}
+            GET  /task/api/messages?taskId=...     -> [{"id": ..., "replies": [...]}, ...]
+
+Both answer after an optional fixed delay to mimic upstream latency.
+
+    python -m benchmarks.stub_apis --port 8090 --latency-ms 20
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+LITEAPI_HOTEL_PATH = "/data/hotel"
+TASK_LOGIN_PATH = "/task/api/api/auth/users"
+TASK_MESSAGES_PATH = "/task/api/messages"
+
+# Unsigned JWT with a far-future exp; the task service only reads its claims
+_TASK_TOKEN = "eyJhbGciOiJub25lIn0.eyJzdWIiOiJiZW5jaCIsImV4cCI6NDEwMjQ0NDgwMH0."
+
+
+class StubStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}
+
+    def add(self, path: str):
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+
+def hotel_payload(hotel_id: str) -> dict:
+    number = sum(map(ord, hotel_id))
+    return {"data": {
+        "id": hotel_id,
+        "name": f"Bench Hotel {hotel_id}",
+        "hotelDescription": "A hotel served by the benchmark stub. " * 20,
+        "country": "in",
+        "city": "Hyderabad",
+        "address": f"{number} Bench Street",
+        "zip": "500001",
+        "starRating": number % 5 + 1,
+        "location": {"latitude": 17.385, "longitude": 78.4867},
+    }}
+
+
+def task_messages_payload(task_id: int) -> list:
+    # Every third message has no replies (filtered out by the service)
+    return [
+        {"id": task_id * 100 + i, "text": f"message {i} of task {task_id}",
+         "replies": [] if i % 3 == 0 else [{"id": i, "text": f"reply to {i}"}]}
+        for i in range(12)
+    ]
+
+
+class StubAPIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real upstreams
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status: int, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        self.server.stats.add(url.path)
+        time.sleep(self.server.latency)
+
+        if url.path == LITEAPI_HOTEL_PATH and "hotelId" in query:
+            self._reply(200, hotel_payload(query["hotelId"][0]))
+        elif url.path == TASK_MESSAGES_PATH and "taskId" in query:
+            self._reply(200, task_messages_payload(int(query["taskId"][0])))
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        self._read_body()
+        self.server.stats.add(url.path)
+        time.sleep(self.server.latency)
+
+        if url.path == TASK_LOGIN_PATH:
+            self._reply(200, {"token": _TASK_TOKEN})
+        else:
+            self._reply(404, {"error": "not found"})
+
+
+class StubAPIServer(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8090, latency_ms: float = 0):
+        super().__init__((host, port), StubAPIHandler)
+        self.latency = latency_ms / 1000
+        self.stats = StubStats()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start_in_background(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, name="stub-apis", daemon=True)
+        thread.start()
+        return thread
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub LiteAPI / task API for offline benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    server = StubAPIServer(args.host, args.port, args.latency_ms)
+    print(f"Stub APIs listening on {server.base_url}")
+    print(f"  LITE_API_URL={server.base_url}{LITEAPI_HOTEL_PATH}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"requests={server.stats.requests}")
+        server.server_close()
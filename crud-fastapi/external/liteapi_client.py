@@ -1,32 +1,114 @@
+import os
+import random
+import time
 import requests
 import logging
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from utils.metrics import OUTBOUND_REQUEST_DURATION
+
+load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+LITE_API_CONNECT_TIMEOUT = float(os.getenv("LITE_API_CONNECT_TIMEOUT", 3))
+LITE_API_READ_TIMEOUT = float(os.getenv("LITE_API_READ_TIMEOUT", 10))
+LITE_API_MAX_RETRIES = int(os.getenv("LITE_API_MAX_RETRIES", 2))
+LITE_API_BACKOFF_BASE = float(os.getenv("LITE_API_BACKOFF_BASE", 0.25))   # seconds
+LITE_API_BACKOFF_MAX = float(os.getenv("LITE_API_BACKOFF_MAX", 4))
+LITE_API_POOL_SIZE = int(os.getenv("LITE_API_POOL_SIZE", 20))
+LITE_API_BREAKER_FAILURES = int(os.getenv("LITE_API_BREAKER_FAILURES", 5))
+LITE_API_BREAKER_RESET_SECONDS = float(os.getenv("LITE_API_BREAKER_RESET_SECONDS", 30))
+
+# Responses worth retrying: throttling and upstream/server errors
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
 class LiteAPIClient:
+    """
+    Pooled HTTP client for LiteAPI, meant to be created once and shared:
+    - One requests.Session with keep-alive connection pooling
+    - Connect / read timeouts on every call
+    - Retries on connection errors, timeouts, 429 and 5xx with jittered exponential backoff
+    - A circuit breaker that fails fast while LiteAPI keeps failing
+    """
     BASE_URL = "https://api.liteapi.travel/v3.0/data"
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, base_url: str | None = None):
         self.api_key = api_key
+        self.base_url = base_url or self.BASE_URL
         self.headers = {
             "X-API-Key": self.api_key,
             "accept": "application/json"
         }
+        self.timeout = (LITE_API_CONNECT_TIMEOUT, LITE_API_READ_TIMEOUT)
+
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=LITE_API_POOL_SIZE)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.breaker = CircuitBreaker(
+            "LiteAPI",
+            failure_threshold=LITE_API_BREAKER_FAILURES,
+            reset_timeout=LITE_API_BREAKER_RESET_SECONDS
+        )
+
+    def _get(self, url: str, params: dict) -> requests.Response:
+        """
+        GET with retries and circuit breaking.
+        Raises CircuitOpenError when the circuit is open, requests exceptions otherwise.
+        Every call let through by the breaker records a success or a failure.
+        """
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            try:
+                with OUTBOUND_REQUEST_DURATION.time(target="liteapi", operation=url.rsplit("/", 1)[-1]):
+                    response = self.session.get(url, params=params, timeout=self.timeout)
+                if response.status_code in RETRYABLE_STATUS_CODES:
+                    response.raise_for_status()
+            except (requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout,
+                    requests.exceptions.HTTPError) as ex:
+                self.breaker.record_failure()
+                if attempt >= LITE_API_MAX_RETRIES:
+                    raise
+                # Full jitter: spread retries so parallel callers do not hit LiteAPI in lockstep
+                delay = random.uniform(0, min(LITE_API_BACKOFF_MAX, LITE_API_BACKOFF_BASE * 2 ** attempt))
+                attempt += 1
+                logger.warning("LiteAPI call failed (%s), retry %s in %.2fs", ex, attempt, delay)
+                time.sleep(delay)
+                continue
+            except BaseException:
+                # Not worth retrying (e.g. InvalidURL, TooManyRedirects, ChunkedEncodingError), but
+                # the outcome must still be recorded or a half-open trial call would never finish
+                self.breaker.record_failure()
+                raise
+
+            # Anything below 500 means LiteAPI itself is healthy, even a 404
+            self.breaker.record_success()
+            response.raise_for_status()
+            return response
 
     def fetch_hotel_details(self, hotel_id: str) -> dict:
         """
         Calls LiteAPI V3 /data/hotel endpoint to fetch hotel details.
         """
-        url = f"{self.BASE_URL}/hotel"
+        url = f"{self.base_url}/hotel"
         params = {"hotelId": hotel_id, "timeout": 4}
 
         try:
-            logger.info(f"Calling LiteAPI: {url} with hotelId={hotel_id}")
-            response = requests.get(url, headers=self.headers, params=params, timeout=6)
-            response.raise_for_status()
+            logger.info("Calling LiteAPI: %s with hotelId=%s", url, hotel_id)
+            response = self._get(url, params)
             data = response.json()
-            logger.debug(f"LiteAPI Response: {data}")
+            logger.debug("LiteAPI Response: %s", data)
             return data
+        except CircuitOpenError as ex:
+            logger.error("LiteAPI request rejected for hotel_id=%s: %s", hotel_id, ex)
+            raise
         except requests.exceptions.RequestException as ex:
-            logger.error(f"LiteAPI request failed for hotel_id={hotel_id}: {ex}")
+            logger.error("LiteAPI request failed for hotel_id=%s: %s", hotel_id, ex)
             raise
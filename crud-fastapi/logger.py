@@ -1,27 +1,140 @@
 # logger.py
+import atexit
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+import os
+import queue
 import sys
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+from dotenv import load_dotenv
 
-# Create a logger
-logger = logging.getLogger("crud_api")  # give your app a name
-logger.setLevel(logging.INFO)  # default level
+from utils.request_context import get_request_id
 
-# Console handler (prints to stdout)
-console_handler = logging.StreamHandler(sys.stdout)
-console_handler.setLevel(logging.INFO)
+load_dotenv()
+
+
+def _level(name: str, setting: str) -> int:
+    # getLevelName returns "Level X" (a str) for unknown names instead of failing
+    level = logging.getLevelName(name.strip().upper())
+    if not isinstance(level, int):
+        raise ValueError(
+            f"{setting}: unknown log level {name.strip()!r} (use DEBUG, INFO, WARNING, ERROR or CRITICAL)"
+        )
+    return level
+
+
+# LOG_LEVEL: default level of the app logger
+# LOG_FORMAT: "text" (default) or "json" (one JSON object per line)
+# LOG_LEVELS: per-module overrides, e.g. "post_service=DEBUG,hotel_service=WARNING,sqlalchemy.engine=INFO"
+#   Names are matched against the app's module names first, then used as logger names.
+LOG_LEVEL = _level(os.getenv("LOG_LEVEL", "INFO"), "LOG_LEVEL")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+LOG_FILE = os.getenv("LOG_FILE", "app.log")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+
+# Attributes every LogRecord has; anything else was passed through `extra=`
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+
+def _parse_levels(spec: str) -> dict:
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        levels[name.strip()] = _level(level, f"LOG_LEVELS entry {item!r}")
+    return levels
+
+
+MODULE_LEVELS = _parse_levels(os.getenv("LOG_LEVELS", ""))
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamps each record with the current request id ("-" outside requests)."""
+
+    def filter(self, record):
+        record.request_id = get_request_id() or "-"
+        return True
+
+
+class ModuleLevelFilter(logging.Filter):
+    """Applies LOG_LEVELS overrides to records from the app logger, keyed by module name."""
+
+    def __init__(self, default_level, levels: dict):
+        super().__init__()
+        self.default_level = default_level
+        self.levels = levels
+
+    def filter(self, record):
+        return record.levelno >= self.levels.get(record.module, self.default_level)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: standard fields, request id, and any `extra=` fields (e.g. timings)."""
+
+    def format(self, record):
+        entry = {
+            "timestamp": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "function": record.funcName,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
 
-# File handler with rotation (max 5 MB per file, keep 3 backups)
-file_handler = RotatingFileHandler("app.log", maxBytes=5*1024*1024, backupCount=3)
-file_handler.setLevel(logging.INFO)
 
 # Log format
-formatter = logging.Formatter(
-    "%(asctime)s - %(name)s - %(levelname)s - %(module)s - %(funcName)s - %(message)s"
-)
+if LOG_FORMAT == "json":
+    formatter = JsonFormatter()
+else:
+    formatter = logging.Formatter(
+        "%(asctime)s - %(name)s - %(levelname)s - %(request_id)s - %(module)s - %(funcName)s - %(message)s"
+    )
+
+# Console handler (prints to stdout)
+console_handler = logging.StreamHandler(sys.stdout)
 console_handler.setFormatter(formatter)
+
+# File handler with rotation (max 5 MB per file, keep 3 backups)
+file_handler = RotatingFileHandler(LOG_FILE, maxBytes=5*1024*1024, backupCount=3)
 file_handler.setFormatter(formatter)
 
-# Add handlers to the logger
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
+# Callers only put records on a queue; a background thread does the stdout / file writes.
+# When the queue is full (log storm) records are dropped rather than blocking requests.
+log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+queue_handler = _NonBlockingQueueHandler(log_queue)
+queue_handler.addFilter(RequestContextFilter())
+
+listener = QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+listener.start()
+atexit.register(listener.stop)
+
+# Create a logger
+logger = logging.getLogger("crud_api")  # give your app a name
+# The logger lets through the most verbose module override; ModuleLevelFilter applies the rest
+logger.setLevel(min([LOG_LEVEL, *MODULE_LEVELS.values()]))
+logger.addFilter(ModuleLevelFilter(LOG_LEVEL, MODULE_LEVELS))
+logger.addHandler(queue_handler)
+logger.propagate = False
+
+# Other loggers (e.g. external.liteapi_client, sqlalchemy.engine, apscheduler) reach the same queue
+# through the root logger: WARNING and above by default, or their LOG_LEVELS override
+logging.getLogger().addHandler(queue_handler)
+for name, level in MODULE_LEVELS.items():
+    if name != "crud_api":
+        logging.getLogger(name).setLevel(level)
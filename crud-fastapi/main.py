@@ -1,12 +1,24 @@
 from fastapi import FastAPI
-from database import engine, Base
-from routers import users, user_profile, post, task_messages_router, hotel_router
+from routers import users, user_profile, post, task_messages_router, hotel_router, monitoring_router, image_router
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from logger import logger
 from scheduler.scheduler import start_scheduler
+from utils.request_context import RequestContextMiddleware
+from utils.metrics import MetricsMiddleware
+from utils.query_stats import QueryStatsMiddleware
+from utils.body_limit import MultipartSizeLimitMiddleware
+from services.storage_service import UPLOAD_MAX_BYTES, UPLOAD_FORM_OVERHEAD
 
 app = FastAPI()
-Base.metadata.create_all(bind=engine)  # Create tables in DB
+# The schema is managed by Alembic migrations (`alembic upgrade head`), run once per deploy
+# rather than on every worker start
+
+# Upload size limit, per-request query budget, per-route latency / status metrics (served at /metrics),
+# then request id + timing log line
+app.add_middleware(MultipartSizeLimitMiddleware, max_bytes=UPLOAD_MAX_BYTES + UPLOAD_FORM_OVERHEAD)
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(MetricsMiddleware, router=app.router)
+app.add_middleware(RequestContextMiddleware)
 
 # need to include all our routers in main.py to enable the endpoints
 app.include_router(users.router)
@@ -14,6 +26,9 @@ app.include_router(user_profile.router)
 app.include_router(post.router)
 app.include_router(task_messages_router.router)
 app.include_router(hotel_router.router)
+app.include_router(monitoring_router.router)
+app.include_router(monitoring_router.metrics_router)
+app.include_router(image_router.router)
 start_scheduler()
 # @app.get("/")
 # def home():
@@ -0,0 +1,107 @@
+"""Baseline: the schema previously created by Base.metadata.create_all() at startup
+
+Databases created that way already have these tables: mark them with
+`alembic stamp 0001_baseline` and then run `alembic upgrade head`.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("username", sa.String()),
+        sa.Column("email", sa.String()),
+        sa.Column("password", sa.String()),
+        sa.UniqueConstraint("email"),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+
+    op.create_table(
+        "user_profiles",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("bio", sa.String(), nullable=True),
+        sa.Column("location", sa.String(), nullable=True),
+        sa.Column("phone", sa.String(), nullable=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.UniqueConstraint("user_id"),
+    )
+    op.create_index("ix_user_profiles_id", "user_profiles", ["id"])
+
+    op.create_table(
+        "posts",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("title", sa.String()),
+        sa.Column("content", sa.String()),
+        sa.Column("image_filename", sa.String(), nullable=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+    )
+
+    op.create_table(
+        "email_queue",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("to_email", sa.String(), nullable=False),
+        sa.Column("subject", sa.String(), nullable=False),
+        sa.Column("body", sa.String(), nullable=False),
+        sa.Column("status", sa.String()),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime()),
+        sa.Column("post_id", sa.Integer(), sa.ForeignKey("posts.id")),
+        sa.UniqueConstraint("post_id"),
+    )
+    op.create_index("ix_email_queue_id", "email_queue", ["id"])
+
+    op.create_table(
+        "books",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("author", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+    )
+    op.create_index("ix_books_id", "books", ["id"])
+
+    op.create_table(
+        "hotels",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("country", sa.String()),
+        sa.Column("city", sa.String()),
+        sa.Column("address", sa.String()),
+        sa.Column("zip", sa.String()),
+        sa.Column("star_rating", sa.Float()),
+        sa.Column("latitude", sa.Float()),
+        sa.Column("longitude", sa.Float()),
+    )
+    op.create_index("ix_hotels_id", "hotels", ["id"])
+
+    op.create_table(
+        "task_messages",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("task_id", sa.Integer()),
+        sa.Column("messages_blob", sa.Text()),
+    )
+    op.create_index("ix_task_messages_id", "task_messages", ["id"])
+    op.create_index("ix_task_messages_task_id", "task_messages", ["task_id"], unique=True)
+
+
+def downgrade():
+    op.drop_table("task_messages")
+    op.drop_table("hotels")
+    op.drop_table("books")
+    op.drop_table("email_queue")
+    op.drop_table("posts")
+    op.drop_table("user_profiles")
+    op.drop_table("users")
@@ -0,0 +1,71 @@
+"""Columns and tables added for caching, dedup and image variants, plus hot-path indexes
+
+- hotels.synced_at, task_messages.content_hash / messages, posts.image_variants, stored_files
+  (skipped when already present: create_all at startup created stored_files on some databases)
+- posts (user_id, id): per-user listing and keyset pagination
+- email_queue: partial index on PENDING rows in claim order, partial index on PROCESSING rows
+  by claim time (stale claim release), and created_at
+Indexes are built CONCURRENTLY so the tables stay writable during the upgrade.
+
+Revision ID: 0002_performance_schema
+Revises: 0001_baseline
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0002_performance_schema"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_posts_user_id_id", "posts (user_id, id)"),
+    ("ix_email_queue_pending", "email_queue (id) WHERE status = 'PENDING'"),
+    ("ix_email_queue_processing", "email_queue (updated_at) WHERE status = 'PROCESSING'"),
+    ("ix_email_queue_created_at", "email_queue (created_at)"),
+]
+
+
+def _has_column(table: str, column: str) -> bool:
+    return column in {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade():
+    if not _has_column("hotels", "synced_at"):
+        op.add_column("hotels", sa.Column("synced_at", sa.DateTime(), nullable=True))
+    if not _has_column("task_messages", "content_hash"):
+        op.add_column("task_messages", sa.Column("content_hash", sa.String(64), nullable=True))
+    if not _has_column("task_messages", "messages"):
+        op.add_column("task_messages", sa.Column("messages", postgresql.JSONB(), nullable=True))
+    if not _has_column("posts", "image_variants"):
+        op.add_column("posts", sa.Column("image_variants", sa.JSON(), nullable=True))
+
+    if not sa.inspect(op.get_bind()).has_table("stored_files"):
+        op.create_table(
+            "stored_files",
+            sa.Column("filename", sa.String(), primary_key=True),
+            sa.Column("content_hash", sa.String(64), nullable=False),
+            sa.Column("size", sa.BigInteger(), nullable=False),
+            sa.Column("ref_count", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+        )
+        op.create_index("ix_stored_files_content_hash", "stored_files", ["content_hash"])
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, definition in INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(INDEXES):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+    op.drop_table("stored_files")
+    op.drop_column("posts", "image_variants")
+    op.drop_column("task_messages", "messages")
+    op.drop_column("task_messages", "content_hash")
+    op.drop_column("hotels", "synced_at")
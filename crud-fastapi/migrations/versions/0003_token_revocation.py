@@ -0,0 +1,33 @@
+"""Shared token revocation state
+
+- users.token_version: tokens carry it as `ver`; bumping it revokes every earlier token of the user
+- revoked_tokens: denylist of individually revoked tokens (logout) by `jti`, until they expire
+
+Revision ID: 0003_token_revocation
+Revises: 0002_performance_schema
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003_token_revocation"
+down_revision = "0002_performance_schema"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("users", sa.Column("token_version", sa.Integer(), nullable=False, server_default="0"))
+
+    op.create_table(
+        "revoked_tokens",
+        sa.Column("jti", sa.String(64), primary_key=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_revoked_tokens_expires_at", "revoked_tokens", ["expires_at"])
+
+
+def downgrade():
+    op.drop_index("ix_revoked_tokens_expires_at", table_name="revoked_tokens")
+    op.drop_table("revoked_tokens")
+    op.drop_column("users", "token_version")
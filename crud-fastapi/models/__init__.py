@@ -0,0 +1,5 @@
+# Importing the package registers every model on Base.metadata (engines are created in database.py)
+from models.base import Base
+from models import (  # noqa: F401
+    book, email_queue, hotel_model, post, revoked_token, stored_file, task_messages, user, user_profile
+)
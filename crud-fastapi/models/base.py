@@ -0,0 +1,6 @@
+# models/base.py
+from sqlalchemy.orm import declarative_base
+
+# Kept apart from database.py so the models (and migrations) can be imported without
+# creating the engines or starting the log listener
+Base = declarative_base()
@@ -1,5 +1,5 @@
 from sqlalchemy import Column, Integer, String, ForeignKey
-from database import Base
+from models.base import Base
 
 class Book(Base):
     __tablename__ = "books"
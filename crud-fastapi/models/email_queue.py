@@ -1,19 +1,25 @@
-from sqlalchemy import Column, Integer, String, DateTime,ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime,ForeignKey, Index, text
 from sqlalchemy.sql import func
-from database import Base
+from models.base import Base
 from sqlalchemy.orm import relationship
 
 
 class EmailQueue(Base):
     __tablename__ = "email_queue"
+    __table_args__ = (
+        # Claiming: WHERE status = 'PENDING' ORDER BY id, only over the (small) pending set
+        Index("ix_email_queue_pending", "id", postgresql_where=text("status = 'PENDING'")),
+        # Stale claim release: WHERE status = 'PROCESSING' AND updated_at < ?
+        Index("ix_email_queue_processing", "updated_at", postgresql_where=text("status = 'PROCESSING'")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     to_email = Column(String, nullable=False)
     subject = Column(String, nullable=False)
     body = Column(String, nullable=False)
-    status = Column(String, default="PENDING")  # PENDING / SENT / FAILED
-    created_at = Column(DateTime, server_default=func.now())
-    updated_at = Column(DateTime, onupdate=func.now())
+    status = Column(String, default="PENDING")  # PENDING / PROCESSING / SENT / FAILED
+    created_at = Column(DateTime, server_default=func.now(), index=True)
+    updated_at = Column(DateTime, onupdate=func.now())  # also the claim time while PROCESSING
 
      # 🔥 One-to-One → EmailQueue belongs to exactly one Post
     post_id = Column(Integer, ForeignKey("posts.id"), unique=True)
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, Integer, Float, Text
-from database import Base
+from sqlalchemy import Column, String, Integer, Float, Text, DateTime
+from models.base import Base
 
 class Hotel(Base):
     __tablename__ = "hotels"
@@ -14,3 +14,4 @@ class Hotel(Base):
     star_rating = Column(Float)
     latitude = Column(Float)
     longitude = Column(Float)
+    synced_at = Column(DateTime, nullable=True)  # last successful fetch from LiteAPI (UTC)
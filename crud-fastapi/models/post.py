@@ -1,14 +1,18 @@
 # models/post.py
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
-from database import Base
+from models.base import Base
 
 class Post(Base):
     __tablename__ = "posts"
+    # Per-user listing / keyset pagination: WHERE user_id = ? AND id > ? ORDER BY id
+    __table_args__ = (Index("ix_posts_user_id_id", "user_id", "id"),)
+
     id = Column(Integer, primary_key=True)
     title = Column(String)
     content = Column(String)
     image_filename = Column(String, nullable=True)  # new column for image
+    image_variants = Column(JSON, nullable=True)  # {"thumbnail": ..., "medium": ...}, filled in the background
     user_id = Column(Integer, ForeignKey("users.id"))
 
     author = relationship("User", back_populates="posts")
@@ -0,0 +1,9 @@
+from sqlalchemy import Column, String, DateTime
+from models.base import Base
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    # Denylist of logged-out tokens, shared by every worker; rows are purged once the token has expired
+    jti = Column(String(64), primary_key=True)
+    expires_at = Column(DateTime, nullable=False, index=True)  # UTC, the token's `exp`
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String, BigInteger, DateTime
+from sqlalchemy.sql import func
+from models.base import Base
+
+class StoredFile(Base):
+    __tablename__ = "stored_files"
+
+    # Uploads are stored once per content: filename is "<sha256><ext>" inside the uploads folder
+    filename = Column(String, primary_key=True)
+    content_hash = Column(String(64), nullable=False, index=True)
+    size = Column(BigInteger, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=1)  # number of posts using this file
+    created_at = Column(DateTime, server_default=func.now())
@@ -1,5 +1,6 @@
 from sqlalchemy import Column, Integer, String, Text
-from database import Base
+from sqlalchemy.dialects.postgresql import JSONB
+from models.base import Base
 
 class TaskMessages(Base):
     __tablename__ = "task_messages"
@@ -7,3 +8,7 @@ class TaskMessages(Base):
     id = Column(Integer, primary_key=True, index=True)
     task_id = Column(Integer, unique=True, index=True)
     messages_blob = Column(Text)  # storing JSON as string
+    # sha256 of the canonical JSON payload; unchanged payloads skip the UPDATE
+    content_hash = Column(String(64), nullable=True)
+    # Same messages as JSONB (optional, TASK_MESSAGES_STORE_JSONB) for per-message queries
+    messages = Column(JSONB(none_as_null=True), nullable=True)
@@ -1,6 +1,6 @@
 from sqlalchemy import Column, Integer, String
 from sqlalchemy.orm import relationship
-from database import Base
+from models.base import Base
 
 class User(Base):
     __tablename__ = "users"
@@ -9,6 +9,8 @@ class User(Base):
     username = Column(String, unique=True, index=True)
     email = Column(String, unique=True)
     password = Column(String)
+    # Tokens carry this as `ver`; incrementing it revokes every token issued before (see auth.py)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     #one to one mapping because uselist=False if it is true means that column accepts list
     profile = relationship("UserProfile", back_populates="user", uselist=False)
@@ -1,15 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from database import get_db
+from schemas.hotel_schema import HotelBulkSyncRequest, HotelBulkSyncResponse
 from services.hotel_service import HotelService
 
 router = APIRouter()
 hotel_service = HotelService()
 
 @router.get("/hotels/sync/{hotel_id}")
-def sync_hotel(hotel_id: str, db: Session = Depends(get_db)):
+def sync_hotel(hotel_id: str, force: bool = False, db: Session = Depends(get_db)):
     try:
-        hotel = hotel_service.sync_hotel(db, hotel_id)
+        hotel = hotel_service.sync_hotel(db, hotel_id, force=force)
         return {"success": True, "hotel": {
             "id": hotel.id,
             "name": hotel.name,
@@ -22,5 +23,14 @@ def sync_hotel(hotel_id: str, db: Session = Depends(get_db)):
             "latitude": hotel.latitude,
             "longitude": hotel.longitude
         }}
+    except HTTPException:
+        # Keep the service's status code (e.g. 503 while the LiteAPI circuit is open)
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+# Sync many hotels in one call; failures are reported per hotel instead of failing the request
+@router.post("/hotels/sync", response_model=HotelBulkSyncResponse)
+def bulk_sync_hotels(request: HotelBulkSyncRequest, db: Session = Depends(get_db)):
+    return hotel_service.bulk_sync_hotels(db, request.hotel_ids)
@@ -0,0 +1,32 @@
+import os
+import re
+from fastapi import APIRouter, HTTPException, Request
+from services.storage_service import UPLOAD_FOLDER
+from utils.file_response import cached_file_response
+from utils.image_variants import VARIANTS_SUBFOLDER
+
+router = APIRouter(prefix="/images", tags=["Images"])
+
+# Public on purpose, unlike /posts: a "<sha256><ext>" name cannot be guessed without the content,
+# so it works as a capability URL that browsers and CDNs may cache for good (no Authorization header
+# to vary on). Older guessable upload names are only served through GET /posts/{id}/image (JWT).
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_STORED_NAME_RE = re.compile(r"^[0-9a-f]{64}(\.[a-z0-9]{1,10})?$")
+_VARIANT_NAME_RE = re.compile(r"^[0-9a-f]{64}_[a-z]+\.jpg$")
+
+
+# ------------------- Original Image -------------------
+@router.get("/{filename}")
+def get_image(filename: str, request: Request):
+    if not _STORED_NAME_RE.match(filename):
+        raise HTTPException(status_code=404, detail="Image not found")
+    return cached_file_response(request, os.path.join(UPLOAD_FOLDER, filename), IMMUTABLE_CACHE_CONTROL)
+
+# ------------------- Resized Variant -------------------
+@router.get("/variants/{filename}")
+def get_image_variant(filename: str, request: Request):
+    if not _VARIANT_NAME_RE.match(filename):
+        raise HTTPException(status_code=404, detail="Image not found")
+    path = os.path.join(UPLOAD_FOLDER, VARIANTS_SUBFOLDER, filename)
+    return cached_file_response(request, path, IMMUTABLE_CACHE_CONTROL)
@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from database import get_pool_stats
+from logger import logger
+from auth import get_current_principal, get_auth_cache_stats
+from utils.metrics import render_prometheus
+
+router = APIRouter(
+    prefix="/monitoring",
+    tags=["Monitoring"],
+    dependencies=[Depends(get_current_principal)]
+)
+
+# Served at the root so Prometheus can scrape the default /metrics path
+metrics_router = APIRouter(tags=["Monitoring"])
+
+# ------------------- DB Connection Pool Stats -------------------
+@router.get("/db-pool")
+def db_pool_stats():
+    stats = get_pool_stats()
+    logger.info("DB pool stats: %s", stats)
+    return stats
+
+# ------------------- Auth Cache Stats -------------------
+@router.get("/auth-cache")
+def auth_cache_stats():
+    return get_auth_cache_stats()
+
+# ------------------- Prometheus Metrics -------------------
+def _pool_metric_lines() -> list[str]:
+    lines = []
+    stats = get_pool_stats()
+    for key in next(iter(stats.values()), {}):
+        name = f"db_pool_{key}"
+        lines += [f"# HELP {name} SQLAlchemy connection pool {key.replace('_', ' ')}", f"# TYPE {name} gauge"]
+        lines += [f'{name}{{engine="{engine_name}"}} {engine_stats[key]}' for engine_name, engine_stats in stats.items()]
+    return lines
+
+def _auth_cache_metric_lines() -> list[str]:
+    lines = []
+    stats = get_auth_cache_stats()
+    for key, kind in (("size", "gauge"), ("hits", "counter"), ("misses", "counter"), ("evictions", "counter")):
+        name = f"auth_cache_{key}" if kind == "gauge" else f"auth_cache_{key}_total"
+        lines += [f"# HELP {name} Auth cache {key}", f"# TYPE {name} {kind}"]
+        lines += [f'{name}{{cache="{cache_name}"}} {cache_stats[key]}' for cache_name, cache_stats in stats.items()]
+    return lines
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    extra_lines = _pool_metric_lines() + _auth_cache_metric_lines()
+    return PlainTextResponse(render_prometheus(extra_lines), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,52 +1,123 @@
-from fastapi import APIRouter, Depends, UploadFile, File   # <-- add File here
+import json
+import os
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from database import get_db
+from starlette.concurrency import run_in_threadpool
+from database import get_db, get_async_db, SessionLocal
 from logger import logger
-from schemas.post import PostCreate, PostResponse
-from services.post_service import PostService
-from auth import get_current_user
+from schemas.post import PostCreate, PostBulkCreate, PostResponse
+from services.post_service import PostService, AsyncPostService, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from services.image_variant_service import ImageVariantService
+from services.storage_service import UPLOAD_FOLDER
+from utils.file_response import cached_file_response
+from auth import get_current_principal
 
 
+# A post's image can be replaced, so clients revalidate with the ETag (cheap 304s)
+POST_IMAGE_CACHE_CONTROL = "private, no-cache"
+
 router = APIRouter(
     prefix="/posts",
     tags=["Posts"],
-    dependencies=[Depends(get_current_user)]
+    dependencies=[Depends(get_current_principal)]
 )
 
+# Create/update handle file uploads and stay on the sync session (run in the threadpool);
+# the read and delete endpoints use the async session.
+
 # ------------------- Create Post -------------------
 @router.post("/user/{user_id}", response_model=PostResponse)
 def create_post_for_user(user_id: int, post: PostCreate = Depends(), file: UploadFile | None = File(None), db: Session = Depends(get_db)):
-    logger.info(f"Attempting to create post for user_id={user_id}, title={post.title}")
+    logger.info("Attempting to create post for user_id=%s, title=%s", user_id, post.title)
     new_post = PostService.create_post(user_id, post, db, file)
-    logger.info(f"Post created successfully: post_id={new_post.id}")
+    logger.info("Post created successfully: post_id=%s", new_post.id)
     return new_post
 
+# Import many posts at once: one transaction, multi-row inserts for posts and their emails
+@router.post("/user/{user_id}/bulk", response_model=list[PostResponse])
+def create_posts_for_user_bulk(user_id: int, batch: PostBulkCreate, db: Session = Depends(get_db)):
+    logger.info("Attempting to create %s posts for user_id=%s", len(batch.posts), user_id)
+    new_posts = PostService.create_posts_bulk(user_id, batch.posts, db)
+    logger.info("Posts created successfully: count=%s", len(new_posts))
+    return new_posts
+
 @router.put("/{post_id}", response_model=PostResponse)
 def update_post(post_id: int, post: PostCreate = Depends(), file: UploadFile | None = File(None), db: Session = Depends(get_db)):
-    logger.info(f"Attempting to update post_id={post_id}, new_title={post.title}")
+    logger.info("Attempting to update post_id=%s, new_title=%s", post_id, post.title)
     updated_post = PostService.update_post(post_id, post, db, file)
-    logger.info(f"Post updated successfully: post_id={updated_post.id}")
+    logger.info("Post updated successfully: post_id=%s", updated_post.id)
     return updated_post
 
 # ------------------- Get All Posts -------------------
+# Keyset pagination: pass the X-Next-Cursor header value back as `after` for the next page
 @router.get("/", response_model=list[PostResponse])
-def get_posts(db: Session = Depends(get_db)):
-    posts = PostService.get_all_posts(db)
-    logger.info(f"Fetched all posts, count={len(posts)}")
+async def get_posts(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: int | None = Query(None, description="Return posts with id greater than this cursor"),
+    user_id: int | None = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    posts, next_cursor = await AsyncPostService.get_posts_page(db, limit=limit, after=after, user_id=user_id)
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    logger.info("Fetched posts page, count=%s, next_cursor=%s", len(posts), next_cursor)
     return posts
 
+# ------------------- Stream All Posts (NDJSON) -------------------
+@router.get("/stream")
+def stream_posts(user_id: int | None = None):
+    def generate():
+        # Own session: the request-scoped one may be closed before the body is fully sent
+        db = SessionLocal()
+        try:
+            for post in PostService.iter_posts(db, user_id=user_id):
+                yield json.dumps({
+                    "id": post.id,
+                    "title": post.title,
+                    "content": post.content,
+                    "image_filename": post.image_filename,
+                    "image_variants": post.image_variants,
+                    "user_id": post.user_id
+                }) + "\n"
+        finally:
+            db.close()
+
+    logger.info("Streaming posts as NDJSON, user_id=%s", user_id)
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
 # ------------------- Get Single Post -------------------
 @router.get("/{post_id}", response_model=PostResponse)
-def get_post(post_id: int, db: Session = Depends(get_db)):
-    logger.info(f"Fetching post_id={post_id}")
-    post = PostService.get_post_by_id(post_id, db)
-    logger.info(f"Post fetched successfully: post_id={post.id}")
+async def get_post(post_id: int, db: AsyncSession = Depends(get_async_db)):
+    logger.info("Fetching post_id=%s", post_id)
+    post = await AsyncPostService.get_post_by_id(post_id, db)
+    logger.info("Post fetched successfully: post_id=%s", post.id)
     return post
 
+# ------------------- Get Post Image -------------------
+@router.get("/{post_id}/image")
+async def get_post_image(
+    post_id: int,
+    request: Request,
+    variant: str | None = Query(None, description="thumbnail, medium or original"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    post = await AsyncPostService.get_post_by_id(post_id, db)
+    filename = ImageVariantService.pick(post, variant)
+    if not filename:
+        raise HTTPException(status_code=404, detail="Post has no image")
+    logger.info("Serving image for post_id=%s, variant=%s", post_id, variant)
+    # The isfile / stat checks block, so they run off the event loop
+    return await run_in_threadpool(
+        cached_file_response, request, os.path.join(UPLOAD_FOLDER, filename), POST_IMAGE_CACHE_CONTROL
+    )
+
 # ------------------- Delete Post -------------------
 @router.delete("/{post_id}", response_model=PostResponse)
-def delete_post(post_id: int, db: Session = Depends(get_db)):
-    logger.info(f"Attempting to delete post_id={post_id}")
-    deleted_post = PostService.delete_post(post_id, db)
-    logger.info(f"Post deleted successfully: post_id={deleted_post.id}")
+async def delete_post(post_id: int, db: AsyncSession = Depends(get_async_db)):
+    logger.info("Attempting to delete post_id=%s", post_id)
+    deleted_post = await AsyncPostService.delete_post(post_id, db)
+    logger.info("Post deleted successfully: post_id=%s", deleted_post.id)
     return deleted_post
@@ -2,20 +2,48 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from database import get_db
 from logger import logger
-from schemas.task_messages import TaskMessagesCreate, TaskMessagesResponse
-from services.task_messages_service import TaskMessagesService
-from auth import get_current_user
+from schemas.task_messages import (
+    TaskMessagesCreate, TaskMessagesResponse, TaskMessagesBatchCreate, TaskMessagesBatchResponse
+)
+from services.task_messages_service import TaskMessagesService, TASK_API_USERNAME
+from auth import get_current_principal
 
 router = APIRouter(
     prefix="/task-messages",
     tags=["Task Messages"],
-    dependencies=[Depends(get_current_user)]
+    dependencies=[Depends(get_current_principal)]
 )
 
+def get_task_api_username() -> str:
+    """Account the messages are fetched with; the sync endpoints are unavailable until it is configured."""
+    if not TASK_API_USERNAME:
+        logger.error("TASK_API_USERNAME is not configured")
+        raise HTTPException(status_code=503, detail="Task messages sync is not configured")
+    return TASK_API_USERNAME
+
 @router.post("/", response_model=TaskMessagesResponse)
-def save_task_messages(task: TaskMessagesCreate, db: Session = Depends(get_db)):
-    logger.info(f"Fetching and saving messages for task_id={task.task_id}")
-    record = TaskMessagesService.fetch_messages(username="ravi", task_id=task.task_id, db=db)
+def save_task_messages(task: TaskMessagesCreate, db: Session = Depends(get_db),
+                       username: str = Depends(get_task_api_username)):
+    logger.info("Fetching and saving messages for task_id=%s", task.task_id)
+    record = TaskMessagesService.fetch_messages(username=username, task_id=task.task_id, db=db)
     if not record:
         raise HTTPException(status_code=404, detail="No messages with replies to save")
     return record
+
+@router.post("/batch", response_model=TaskMessagesBatchResponse)
+def save_task_messages_batch(batch: TaskMessagesBatchCreate, db: Session = Depends(get_db),
+                             username: str = Depends(get_task_api_username)):
+    logger.info("Fetching and saving messages for %s tasks", len(batch.task_ids))
+    return TaskMessagesService.bulk_fetch_messages(username=username, task_ids=batch.task_ids, db=db)
+
+@router.get("/{task_id}/messages/count")
+def count_task_messages(task_id: int, db: Session = Depends(get_db)):
+    return {"task_id": task_id, "count": TaskMessagesService.count_messages(task_id, db)}
+
+@router.get("/{task_id}/messages/{index}")
+def get_task_message(task_id: int, index: int, db: Session = Depends(get_db)):
+    return TaskMessagesService.get_message(task_id, index, db)
+
+@router.get("/{task_id}/messages/{index}/replies")
+def get_task_message_replies(task_id: int, index: int, db: Session = Depends(get_db)):
+    return TaskMessagesService.get_message(task_id, index, db).get("replies", [])
@@ -1,22 +1,33 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Security
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
 from schemas.user import UserCreate, UserResponse, UserLogin
-from database import get_db
+from database import get_async_db
+from auth import get_current_principal, revoke_token, TokenPrincipal, bearer_scheme
 from logger import logger
-from services.user_service import UserService
+from services.user_service import AsyncUserService
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 @router.post("/register", response_model=UserResponse)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    logger.info(f"Attempting to register user: username={user.username}")
-    new_user = UserService.register_user(user, db)
-    logger.info(f"User registered successfully: user_id={new_user.id}")
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    logger.info("Attempting to register user: username=%s", user.username)
+    new_user = await AsyncUserService.register_user(user, db)
+    logger.info("User registered successfully: user_id=%s", new_user.id)
     return new_user
 
 @router.post("/login")
-def login(user: UserLogin, db: Session = Depends(get_db)):
-    logger.info(f"Login attempt for username={user.username}")
-    result = UserService.login_user(user, db)
-    logger.info(f"Login successful for username={user.username}")
+async def login(user: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    logger.info("Login attempt for username=%s", user.username)
+    result = await AsyncUserService.login_user(user, db)
+    logger.info("Login successful for username=%s", user.username)
     return result
+
+@router.post("/logout", status_code=204)
+async def logout(
+    principal: TokenPrincipal = Depends(get_current_principal),
+    credentials: HTTPAuthorizationCredentials = Security(bearer_scheme),
+    db: AsyncSession = Depends(get_async_db)
+):
+    await revoke_token(credentials.credentials, principal, db)
+    logger.info("Token revoked for username=%s", principal.username)
@@ -0,0 +1,108 @@
+import os
+import select
+import threading
+import time
+from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from database import SessionLocal, engine
+from logger import logger
+from services.email_queue_service import EmailQueueService
+from utils.metrics import SCHEDULER_JOB_DURATION
+
+load_dotenv()
+
+EMAIL_NOTIFY_CHANNEL = "email_queue"
+# LISTEN on Postgres so an email queued by any instance wakes the dispatchers of all instances
+EMAIL_QUEUE_LISTEN = os.getenv("EMAIL_QUEUE_LISTEN", "true").lower() == "true"
+
+# Set whenever an email was queued; the dispatcher thread sleeps on it
+_wakeup = threading.Event()
+_started = False
+_start_lock = threading.Lock()
+
+
+def _is_postgres(bind) -> bool:
+    return bind is not None and bind.dialect.name == "postgresql"
+
+
+def publish_email_queued(db: Session):
+    """
+    Announce a queued email to every instance.
+    Call before committing: Postgres delivers the NOTIFY only if the transaction commits.
+    """
+    if EMAIL_QUEUE_LISTEN and _is_postgres(db.get_bind()):
+        db.execute(text(f"NOTIFY {EMAIL_NOTIFY_CHANNEL}"))
+
+
+def wake_email_dispatcher():
+    """Wake the dispatcher in this process right away (call after commit)."""
+    _wakeup.set()
+
+
+def _dispatch_loop():
+    while True:
+        _wakeup.wait()
+        _wakeup.clear()
+
+        db = SessionLocal()
+        try:
+            with SCHEDULER_JOB_DURATION.time(job="email_dispatch"):
+                EmailQueueService.process_pending_emails(db)
+        except Exception as e:
+            logger.error("Error while dispatching queued emails: %s", e)
+        finally:
+            db.close()
+
+
+def _listen_loop():
+    """
+    Hold a dedicated connection that LISTENs on the email channel and wakes the dispatcher.
+    Reconnects with backoff if the connection drops.
+    """
+    import psycopg2
+
+    dsn = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+    backoff = 1
+
+    while True:
+        conn = None
+        try:
+            conn = psycopg2.connect(dsn)
+            conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            with conn.cursor() as cursor:
+                cursor.execute(f"LISTEN {EMAIL_NOTIFY_CHANNEL}")
+            logger.info("Listening for email queue notifications on channel '%s'", EMAIL_NOTIFY_CHANNEL)
+            backoff = 1
+
+            # Notifications that arrived while disconnected are covered by this catch-up run
+            _wakeup.set()
+
+            while True:
+                if select.select([conn], [], [], 60) == ([], [], []):
+                    continue
+                conn.poll()
+                if conn.notifies:
+                    conn.notifies.clear()
+                    _wakeup.set()
+        except Exception as e:
+            logger.error("Email queue listener failed, reconnecting in %ss: %s", backoff, e)
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 60)
+        finally:
+            if conn is not None:
+                conn.close()
+
+
+def start_email_dispatcher():
+    """Start the dispatcher thread (and the Postgres listener when available) once per process."""
+    global _started
+    with _start_lock:
+        if _started:
+            return
+        _started = True
+
+    threading.Thread(target=_dispatch_loop, name="email-dispatcher", daemon=True).start()
+    if EMAIL_QUEUE_LISTEN and _is_postgres(engine):
+        threading.Thread(target=_listen_loop, name="email-queue-listener", daemon=True).start()
+    logger.info("Email dispatcher started.")
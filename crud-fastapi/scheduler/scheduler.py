@@ -1,26 +1,92 @@
+import os
 from apscheduler.schedulers.background import BackgroundScheduler
 from sqlalchemy.orm import Session
+from auth import purge_expired_revocations
 from database import SessionLocal
 from logger import logger
+from models.task_messages import TaskMessages
 from services.email_queue_service import EmailQueueService
+from services.task_messages_service import TaskMessagesService, TASK_API_USERNAME
+from scheduler.email_dispatcher import start_email_dispatcher
+from utils.metrics import SCHEDULER_JOB_DURATION
+
+# New emails are dispatched as soon as they are queued (see email_dispatcher);
+# this sweep is only a safety net for missed notifications.
+EMAIL_SWEEP_INTERVAL_MINUTES = int(os.getenv("EMAIL_SWEEP_INTERVAL_MINUTES", 10))
+
+# Periodic task messages sync, off unless an interval is set (0 or unset disables it) and
+# TASK_API_USERNAME is configured. Syncs TASK_MESSAGES_SYNC_TASK_IDS (comma separated) or,
+# when unset, every task already stored in task_messages.
+TASK_MESSAGES_SYNC_INTERVAL_MINUTES = int(os.getenv("TASK_MESSAGES_SYNC_INTERVAL_MINUTES") or 0)
+TASK_MESSAGES_SYNC_TASK_IDS = os.getenv("TASK_MESSAGES_SYNC_TASK_IDS", "")
+
+# Logged-out tokens stay on the denylist until they expire; expired entries are deleted this often
+REVOKED_TOKENS_PURGE_INTERVAL_MINUTES = int(os.getenv("REVOKED_TOKENS_PURGE_INTERVAL_MINUTES", 60))
 
 
 def process_pending_emails():
-    """Job: Pick pending emails and send them."""
+    """Job: Safety sweep that picks up pending emails and sends them."""
     logger.info("Scheduler started: Checking for pending emails...")
 
     db: Session = SessionLocal()
 
     try:
-        EmailQueueService.process_pending_emails(db)
+        with SCHEDULER_JOB_DURATION.time(job="email_sweep"):
+            EmailQueueService.process_pending_emails(db)
+    except Exception as e:
+        logger.error("Error while processing pending emails: %s", e)
+    finally:
+        db.close()
+
+
+def sync_task_messages():
+    """Job: Batch sync messages for the configured (or already known) tasks."""
+    logger.info("Scheduler started: Syncing task messages...")
+
+    db: Session = SessionLocal()
+
+    try:
+        with SCHEDULER_JOB_DURATION.time(job="task_messages_sync"):
+            task_ids = [int(t) for t in TASK_MESSAGES_SYNC_TASK_IDS.split(",") if t.strip()]
+            if not task_ids:
+                task_ids = [task_id for (task_id,) in db.query(TaskMessages.task_id).all()]
+            if task_ids:
+                TaskMessagesService.bulk_fetch_messages(username=TASK_API_USERNAME, task_ids=task_ids, db=db)
+    except Exception as e:
+        logger.error("Error while syncing task messages: %s", e)
+    finally:
+        db.close()
+
+
+def purge_revoked_tokens():
+    """Job: Delete denylist entries of tokens that have expired anyway."""
+    db: Session = SessionLocal()
+
+    try:
+        with SCHEDULER_JOB_DURATION.time(job="revoked_tokens_purge"):
+            removed = purge_expired_revocations(db)
+        logger.info("Purged %s expired revoked tokens", removed)
     except Exception as e:
-        logger.error(f"Error while processing pending emails: {e}")
+        logger.error("Error while purging revoked tokens: %s", e)
     finally:
         db.close()
 
 
 def start_scheduler():
     scheduler = BackgroundScheduler()
-    scheduler.add_job(process_pending_emails, "interval", minutes=1)
+    # One run at a time per instance; other instances are kept apart by SKIP LOCKED claiming
+    scheduler.add_job(
+        process_pending_emails, "interval", minutes=EMAIL_SWEEP_INTERVAL_MINUTES, max_instances=1, coalesce=True
+    )
+    if TASK_MESSAGES_SYNC_INTERVAL_MINUTES > 0 and not TASK_API_USERNAME:
+        logger.warning("TASK_API_USERNAME is not set: task messages sync disabled")
+    elif TASK_MESSAGES_SYNC_INTERVAL_MINUTES > 0:
+        scheduler.add_job(
+            sync_task_messages, "interval", minutes=TASK_MESSAGES_SYNC_INTERVAL_MINUTES, max_instances=1, coalesce=True
+        )
+    scheduler.add_job(
+        purge_revoked_tokens, "interval", minutes=REVOKED_TOKENS_PURGE_INTERVAL_MINUTES, max_instances=1, coalesce=True
+    )
     scheduler.start()
+    start_email_dispatcher()
     logger.info("APScheduler started successfully.")
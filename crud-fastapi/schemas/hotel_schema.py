@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 
 class HotelCreate(BaseModel):
     id: str
@@ -15,3 +15,20 @@ class HotelCreate(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class HotelBulkSyncRequest(BaseModel):
+    hotel_ids: List[str] = Field(..., min_items=1, max_items=10000)
+
+
+class HotelSyncResult(BaseModel):
+    hotel_id: str
+    success: bool
+    error: Optional[str] = None
+
+
+class HotelBulkSyncResponse(BaseModel):
+    total: int
+    succeeded: int
+    failed: int
+    results: List[HotelSyncResult]
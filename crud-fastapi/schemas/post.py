@@ -1,16 +1,20 @@
 # schemas/post.py
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
 
 class PostCreate(BaseModel):
     title: str
     content: str
 
+class PostBulkCreate(BaseModel):
+    posts: List[PostCreate] = Field(..., min_items=1, max_items=4000)
+
 class PostResponse(BaseModel):
     id: int
     title: str
     content: str
     image_filename: Optional[str] = None
+    image_variants: Optional[Dict[str, str]] = None
     user_id: int
 
     class Config:
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Any
+from pydantic import BaseModel, Field
+from typing import List, Any, Optional
 
 class TaskMessagesCreate(BaseModel):
     task_id: int
@@ -11,3 +11,17 @@ class TaskMessagesResponse(BaseModel):
 
     class Config:
         orm_mode = True
+
+class TaskMessagesBatchCreate(BaseModel):
+    task_ids: List[int] = Field(..., min_items=1, max_items=5000)
+
+class TaskSyncResult(BaseModel):
+    task_id: int
+    status: str  # SAVED / UNCHANGED / NO_REPLIES / FAILED
+    error: Optional[str] = None
+
+class TaskMessagesBatchResponse(BaseModel):
+    total: int
+    saved: int
+    failed: int
+    results: List[TaskSyncResult]
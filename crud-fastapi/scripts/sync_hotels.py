@@ -0,0 +1,47 @@
+# scripts/sync_hotels.py
+"""
+Bulk sync hotels from LiteAPI into the hotels table.
+
+    python -m scripts.sync_hotels lp1897 lp1f982
+    python -m scripts.sync_hotels --file hotel_ids.txt --concurrency 16
+
+The file holds one hotel id per line; blank lines and lines starting with # are ignored.
+"""
+import argparse
+import json
+import sys
+
+from database import SessionLocal
+from services.hotel_service import HotelService, HOTEL_SYNC_CONCURRENCY
+
+
+def read_ids(path: str) -> list[str]:
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk sync hotels from LiteAPI")
+    parser.add_argument("hotel_ids", nargs="*", help="Hotel ids to sync")
+    parser.add_argument("--file", help="File with one hotel id per line")
+    parser.add_argument("--concurrency", type=int, default=HOTEL_SYNC_CONCURRENCY)
+    args = parser.parse_args()
+
+    hotel_ids = list(args.hotel_ids)
+    if args.file:
+        hotel_ids += read_ids(args.file)
+    if not hotel_ids:
+        parser.error("no hotel ids given")
+
+    db = SessionLocal()
+    try:
+        report = HotelService.bulk_sync_hotels(db, hotel_ids, concurrency=args.concurrency)
+    finally:
+        db.close()
+
+    print(json.dumps(report, indent=2))
+    return 0 if report["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
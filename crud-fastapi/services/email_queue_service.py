@@ -1,72 +1,185 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.sql import func
 from models.email_queue import EmailQueue
-from sqlalchemy.orm import Session
-from utils.email_sender import EmailSender
+from services.image_variant_service import ImageVariantService
+from utils.email_sender import EmailSender, SMTPSessionPool
 from logger import logger
 
+load_dotenv()
+
+# Rows claimed per batch, threads sending one batch, and how long a PROCESSING row may stay
+# claimed before it is considered abandoned (worker crashed) and handed back to PENDING.
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", 50))
+EMAIL_WORKERS = int(os.getenv("EMAIL_WORKERS", 4))
+EMAIL_CLAIM_TIMEOUT_SECONDS = int(os.getenv("EMAIL_CLAIM_TIMEOUT_SECONDS", 600))
+# Post image size attached to emails: thumbnail / medium / original (falls back to original)
+EMAIL_IMAGE_VARIANT = os.getenv("EMAIL_IMAGE_VARIANT", "medium")
+
 
 class EmailQueueService:
     """
     Service for processing queued emails.
-    Fetches pending emails, sends them, and updates their status.
+    Claims pending emails in batches, sends them concurrently, and updates their status.
+    Safe to run from several app instances at once: rows are claimed with
+    SELECT ... FOR UPDATE SKIP LOCKED, so each email is picked up by one worker only.
     """
 
     @staticmethod
     def process_pending_emails(db: Session):
         """
         Process all emails with status 'PENDING':
-        - Attempt to send each email via EmailSender
+        - Hand back stale PROCESSING claims from crashed workers
+        - Claim a batch (PENDING -> PROCESSING) and send it with a bounded thread pool
+        - Each worker thread reuses one SMTP connection for the whole run
         - Update status to SENT or FAILED based on result
-        - Log the full workflow
+        - Repeat until no pending emails are left
         """
         logger.info("Checking for pending emails to process...")
 
-        # Fetch pending emails
-        pending_emails = db.query(EmailQueue).filter(EmailQueue.status == "PENDING").all()
+        EmailQueueService.release_stale_claims(db)
+
+        total = 0
+        smtp_pool = SMTPSessionPool()
+        try:
+            with ThreadPoolExecutor(max_workers=EMAIL_WORKERS, thread_name_prefix="email-worker") as executor:
+                while True:
+                    batch = EmailQueueService.claim_batch(db, EMAIL_BATCH_SIZE)
+                    if not batch:
+                        break
+
+                    total += len(batch)
+                    logger.info("Claimed %s pending emails for processing.", len(batch))
 
-        if not pending_emails:
+                    results = executor.map(
+                        lambda job: EmailQueueService._send_claimed(job, smtp_pool), batch
+                    )
+                    EmailQueueService._record_results(db, list(results))
+        finally:
+            smtp_pool.close_all()
+
+        if not total:
             logger.info("No pending emails found.")
             return
 
-        logger.info("Found %s pending emails for processing.", len(pending_emails))
+        logger.info("Email queue processing completed: %s emails processed.", total)
 
-        # Process emails one-by-one
-        for email in pending_emails:
-            logger.info("Processing email_id=%s for recipient=%s", email.id, email.to_email)
+    @staticmethod
+    def claim_batch(db: Session, batch_size: int):
+        """
+        Claim up to `batch_size` pending emails:
+        - Locks rows with FOR UPDATE SKIP LOCKED so concurrent workers never get the same row
+        - Loads the related Post in the same query (its image is the attachment)
+        - Marks them PROCESSING and commits, releasing the row locks
+        Returns plain dicts so the batch can be handed to worker threads without the session.
+        """
+        try:
+            emails = (
+                db.query(EmailQueue)
+                .options(joinedload(EmailQueue.post))
+                .filter(EmailQueue.status == "PENDING")
+                .order_by(EmailQueue.id)
+                .limit(batch_size)
+                # Lock only email_queue rows; posts is on the nullable side of the outer join
+                .with_for_update(skip_locked=True, of=EmailQueue)
+                .all()
+            )
 
-            try:
-                sent = EmailSender.send_email(
-                    to_email=email.to_email,
-                    subject=email.subject,
-                    body=email.body,
-                    db=db,
-                    post_id=email.post_id
-                )
+            batch = []
+            for email in emails:
+                email.status = "PROCESSING"
+                batch.append({
+                    "id": email.id,
+                    "to_email": email.to_email,
+                    "subject": email.subject,
+                    "body": email.body,
+                    "post_id": email.post_id,
+                    "image_filename": ImageVariantService.pick(email.post, EMAIL_IMAGE_VARIANT) if email.post else None,
+                })
 
-                # Update email status
-                if sent:
-                    email.status = "SENT"
-                    logger.info("Email sent successfully: email_id=%s", email.id)
-                else:
-                    email.status = "FAILED"
-                    logger.warning("Email failed to send: email_id=%s", email.id)
-
-            except Exception as e:
-                # Log and mark as failed
-                email.status = "FAILED"
-                logger.error(
-                    "Exception occurred while sending email (email_id=%s): %s",
-                    email.id, str(e)
-                )
+            db.commit()
+            return batch
+        except Exception as e:
+            db.rollback()
+            logger.error("Failed to claim pending emails: %s", str(e))
+            return []
 
-            # Commit after each email to avoid batch failure
-            try:
-                db.commit()
-            except Exception as commit_error:
-                db.rollback()
-                logger.error(
-                    "Database commit failed after processing email_id=%s: %s",
-                    email.id, str(commit_error)
-                )
-                # continue processing other emails gracefully
+    @staticmethod
+    def release_stale_claims(db: Session):
+        """
+        Return PROCESSING rows older than EMAIL_CLAIM_TIMEOUT_SECONDS to PENDING.
+        Covers workers that died after claiming a batch; such emails may be sent twice.
+        """
+        try:
+            cutoff = func.now() - timedelta(seconds=EMAIL_CLAIM_TIMEOUT_SECONDS)
+            released = (
+                db.query(EmailQueue)
+                .filter(EmailQueue.status == "PROCESSING", EmailQueue.updated_at < cutoff)
+                .update({EmailQueue.status: "PENDING"}, synchronize_session=False)
+            )
+            db.commit()
+            if released:
+                logger.warning("Released %s stale email claims back to PENDING.", released)
+        except Exception as e:
+            db.rollback()
+            logger.error("Failed to release stale email claims: %s", str(e))
 
-        logger.info("Email queue processing completed.")
+    @staticmethod
+    def _send_claimed(job: dict, smtp_pool: SMTPSessionPool):
+        """
+        Send one claimed email from a worker thread.
+        Everything needed was loaded by claim_batch, so no database access happens here.
+        """
+        logger.info("Processing email_id=%s for recipient=%s", job["id"], job["to_email"])
+
+        try:
+            sent = EmailSender.send_email(
+                to_email=job["to_email"],
+                subject=job["subject"],
+                body=job["body"],
+                post_id=job["post_id"],
+                smtp=smtp_pool.get(),
+                attachment_filename=job["image_filename"]
+            )
+        except Exception as e:
+            logger.error(
+                "Exception occurred while sending email (email_id=%s): %s",
+                job["id"], str(e)
+            )
+            sent = False
+
+        if sent:
+            logger.info("Email sent successfully: email_id=%s", job["id"])
+        else:
+            logger.warning("Email failed to send: email_id=%s", job["id"])
+
+        return job["id"], sent
+
+    @staticmethod
+    def _record_results(db: Session, results):
+        """
+        Write the final SENT / FAILED status for a processed batch (two UPDATE statements).
+        """
+        sent_ids = [email_id for email_id, sent in results if sent]
+        failed_ids = [email_id for email_id, sent in results if not sent]
+
+        try:
+            if sent_ids:
+                db.query(EmailQueue).filter(EmailQueue.id.in_(sent_ids)).update(
+                    {EmailQueue.status: "SENT"}, synchronize_session=False
+                )
+            if failed_ids:
+                db.query(EmailQueue).filter(EmailQueue.id.in_(failed_ids)).update(
+                    {EmailQueue.status: "FAILED"}, synchronize_session=False
+                )
+            db.commit()
+        except Exception as commit_error:
+            db.rollback()
+            # Rows stay PROCESSING and are handed back by release_stale_claims
+            logger.error(
+                "Database commit failed after processing email batch %s: %s",
+                sent_ids + failed_ids, str(commit_error)
+            )
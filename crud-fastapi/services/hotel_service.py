@@ -1,6 +1,12 @@
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
+from database import SessionLocal
 from models.hotel_model import Hotel
+from external.liteapi_client import LiteAPIClient
+from utils.circuit_breaker import CircuitOpenError
+from utils.single_flight import SingleFlight
 from fastapi import HTTPException
 from logger import logger
 import os
@@ -11,6 +17,24 @@ load_dotenv()
 API_KEY = os.getenv("LITE_API_KEY")
 API_URL = os.getenv("LITE_API_URL")
 
+# Bulk sync: parallel LiteAPI calls, and rows per INSERT ... ON CONFLICT statement
+HOTEL_SYNC_CONCURRENCY = int(os.getenv("HOTEL_SYNC_CONCURRENCY", 8))
+HOTEL_UPSERT_CHUNK_SIZE = int(os.getenv("HOTEL_UPSERT_CHUNK_SIZE", 500))
+
+# Freshness of stored hotels: younger than the TTL is served from the DB as is; within the
+# stale window it is served from the DB while a background refresh runs; older is re-fetched.
+HOTEL_CACHE_TTL_SECONDS = int(os.getenv("HOTEL_CACHE_TTL_SECONDS", 3600))
+HOTEL_STALE_TTL_SECONDS = int(os.getenv("HOTEL_STALE_TTL_SECONDS", 86400))
+
+# Concurrent syncs of one hotel share a single upstream call
+hotel_sync_flight = SingleFlight()
+revalidate_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="hotel-revalidate")
+
+# Single pooled client shared by every sync; LITE_API_URL points at the /data/hotel endpoint
+liteapi_client = LiteAPIClient(
+    API_KEY, base_url=API_URL.removesuffix("/hotel") if API_URL else None
+)
+
 
 class HotelService:
     """
@@ -19,57 +43,174 @@ class HotelService:
     """
 
     @staticmethod
-    def sync_hotel(db: Session, hotel_id: str):
+    def fetch_hotel_data(hotel_id: str) -> dict:
         """
-        Sync hotel information from LiteAPI:
-        - Fetch hotel details using external API
-        - Create or update hotel record in local DB
+        Fetch hotel details for one hotel from LiteAPI.
+        Returns the `data` object of the response.
         """
-        logger.info("Starting hotel sync for hotel_id: %s", hotel_id)
-
-        # Prepare API request
-        headers = {"X-API-Key": API_KEY, "accept": "application/json"}
-
         try:
-            response = requests.get(f"{API_URL}?hotelId={hotel_id}&timeout=4", headers=headers)
-            response.raise_for_status()
+            payload = liteapi_client.fetch_hotel_details(hotel_id)
             logger.info("LiteAPI response received successfully for hotel_id: %s", hotel_id)
+        except CircuitOpenError:
+            # LiteAPI is failing: reject right away instead of tying up a worker on it
+            raise HTTPException(status_code=503, detail="Hotel data provider temporarily unavailable")
         except Exception as e:
             logger.error("Failed to fetch hotel data from LiteAPI for hotel_id %s: %s", hotel_id, str(e))
             raise HTTPException(status_code=500, detail="Failed to fetch hotel data")
 
-        data = response.json().get("data")
+        data = payload.get("data")
 
         if not data:
             logger.warning("No hotel data found in API for hotel_id: %s", hotel_id)
             raise HTTPException(status_code=404, detail="Hotel data not found from API")
 
-        # Check if hotel exists or create new record
+        return data
+
+    @staticmethod
+    def to_hotel_fields(data: dict) -> dict:
+        """
+        Map a LiteAPI hotel payload to Hotel column values.
+        """
+        location = data.get("location") or {}
+        return {
+            "name": data.get("name") or "No Name",
+            "description": data.get("hotelDescription"),
+            "country": data.get("country"),
+            "city": data.get("city"),
+            "address": data.get("address"),
+            "zip": data.get("zip"),
+            "star_rating": data.get("starRating"),
+            "latitude": location.get("latitude"),
+            "longitude": location.get("longitude"),
+            "synced_at": datetime.utcnow(),
+        }
+
+    @staticmethod
+    def sync_hotel(db: Session, hotel_id: str, force: bool = False):
+        """
+        Sync hotel information from LiteAPI:
+        - Serve the stored hotel while it is younger than HOTEL_CACHE_TTL_SECONDS
+        - Serve a stale hotel and refresh it in the background (stale-while-revalidate)
+        - Otherwise (or with force=True) fetch hotel details using external API
+          and create or update hotel record in local DB
+        """
+        logger.info("Starting hotel sync for hotel_id: %s", hotel_id)
+
         hotel = db.query(Hotel).filter(Hotel.id == hotel_id).first()
+        if hotel and hotel.synced_at and not force:
+            age = (datetime.utcnow() - hotel.synced_at).total_seconds()
+            if age < HOTEL_CACHE_TTL_SECONDS:
+                logger.info("Hotel %s is fresh (%.0fs old), skipping LiteAPI", hotel_id, age)
+                return hotel
+            if age < HOTEL_CACHE_TTL_SECONDS + HOTEL_STALE_TTL_SECONDS:
+                logger.info("Hotel %s is stale (%.0fs old), refreshing in background", hotel_id, age)
+                future = hotel_sync_flight.submit(
+                    hotel_id, lambda: HotelService.refresh_hotel(hotel_id), revalidate_executor
+                )
+                future.add_done_callback(lambda f: HotelService._log_refresh_failure(hotel_id, f))
+                return hotel
+
         if not hotel:
             logger.info("Hotel record not found. Creating new hotel entry for hotel_id: %s", hotel_id)
-            hotel = Hotel(id=hotel_id)
-
-        # Update hotel fields
-        hotel.name = data.get("name") or "No Name"
-        hotel.description = data.get("hotelDescription")
-        hotel.country = data.get("country")
-        hotel.city = data.get("city")
-        hotel.address = data.get("address")
-        hotel.zip = data.get("zip")
-        hotel.star_rating = data.get("starRating")
-        hotel.latitude = data.get("location", {}).get("latitude")
-        hotel.longitude = data.get("location", {}).get("longitude")
-
-        # Save changes to database
+
+        # Concurrent requests for this hotel wait on the same fetch + write
+        hotel_sync_flight.do(hotel_id, lambda: HotelService.refresh_hotel(hotel_id))
+
+        # Reload: the row was written by the refresh's own session
+        hotel = db.query(Hotel).populate_existing().filter(Hotel.id == hotel_id).first()
+        logger.info("Hotel sync successful for hotel_id: %s", hotel_id)
+        return hotel
+
+    @staticmethod
+    def _log_refresh_failure(hotel_id: str, future):
+        """Done callback of a background revalidation: nobody waits on it, so report its error here."""
+        error = future.exception()
+        if error is not None:
+            logger.exception("Background refresh failed for hotel_id %s", hotel_id, exc_info=error)
+
+    @staticmethod
+    def refresh_hotel(hotel_id: str):
+        """
+        Fetch one hotel from LiteAPI and upsert it, in a session of its own
+        (runs for coalesced callers and in background revalidation).
+        """
+        data = HotelService.fetch_hotel_data(hotel_id)
+
+        db = SessionLocal()
         try:
-            db.add(hotel)
+            HotelService.upsert_hotels(db, [{"id": hotel_id, **HotelService.to_hotel_fields(data)}])
             db.commit()
-            db.refresh(hotel)
-            logger.info("Hotel sync successful for hotel_id: %s", hotel_id)
         except Exception as e:
             logger.error("Database error while syncing hotel_id %s: %s", hotel_id, str(e))
             db.rollback()
             raise HTTPException(status_code=500, detail="Failed to sync hotel")
+        finally:
+            db.close()
 
-        return hotel
+    @staticmethod
+    def bulk_sync_hotels(db: Session, hotel_ids: list[str], concurrency: int = HOTEL_SYNC_CONCURRENCY):
+        """
+        Sync many hotels at once:
+        - Fetches hotels from LiteAPI concurrently (at most `concurrency` calls in flight)
+        - Writes all fetched hotels with batched INSERT ... ON CONFLICT DO UPDATE
+        - Returns a per-hotel success / failure report
+        """
+        # Drop duplicates but keep the caller's order
+        hotel_ids = list(dict.fromkeys(hotel_ids))
+        logger.info("Starting bulk hotel sync for %s hotels (concurrency=%s)", len(hotel_ids), concurrency)
+
+        def fetch(hotel_id):
+            try:
+                return hotel_id, HotelService.fetch_hotel_data(hotel_id), None
+            except HTTPException as e:
+                return hotel_id, None, e.detail
+            except Exception as e:
+                return hotel_id, None, str(e)
+
+        results = {}
+        rows = []
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(hotel_ids) or 1))) as executor:
+            for hotel_id, data, error in executor.map(fetch, hotel_ids):
+                if error:
+                    results[hotel_id] = {"hotel_id": hotel_id, "success": False, "error": error}
+                    continue
+                rows.append({"id": hotel_id, **HotelService.to_hotel_fields(data)})
+                results[hotel_id] = {"hotel_id": hotel_id, "success": True, "error": None}
+
+        # Upsert in chunks; a failed chunk marks only its own hotels as failed
+        for start in range(0, len(rows), HOTEL_UPSERT_CHUNK_SIZE):
+            chunk = rows[start:start + HOTEL_UPSERT_CHUNK_SIZE]
+            try:
+                HotelService.upsert_hotels(db, chunk)
+                db.commit()
+            except Exception as e:
+                logger.error("Database error while upserting %s hotels: %s", len(chunk), str(e))
+                db.rollback()
+                for row in chunk:
+                    results[row["id"]] = {"hotel_id": row["id"], "success": False, "error": "Failed to save hotel"}
+
+        report = [results[hotel_id] for hotel_id in hotel_ids]
+        succeeded = sum(1 for item in report if item["success"])
+        logger.info("Bulk hotel sync finished: %s succeeded, %s failed", succeeded, len(report) - succeeded)
+
+        return {
+            "total": len(report),
+            "succeeded": succeeded,
+            "failed": len(report) - succeeded,
+            "results": report,
+        }
+
+    @staticmethod
+    def upsert_hotels(db: Session, rows: list[dict]):
+        """
+        Insert or update many hotel rows with one INSERT ... ON CONFLICT (id) DO UPDATE statement.
+        The caller commits.
+        """
+        if not rows:
+            return
+        stmt = insert(Hotel).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Hotel.id],
+            set_={column: stmt.excluded[column] for column in rows[0] if column != "id"},
+        )
+        db.execute(stmt)
@@ -0,0 +1,92 @@
+# services/image_variant_service.py
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dotenv import load_dotenv
+
+from database import SessionLocal
+from models.post import Post
+from logger import logger
+from services.storage_service import UPLOAD_FOLDER
+from utils.image_variants import IMAGE_VARIANT_SIZES, generate_variants, variant_filename
+
+load_dotenv()
+
+IMAGE_PIPELINE_WORKERS = int(os.getenv("IMAGE_PIPELINE_WORKERS", 2))
+IMAGE_PIPELINE_ENABLED = os.getenv("IMAGE_PIPELINE_ENABLED", "true").lower() == "true"
+
+try:
+    import PIL  # noqa: F401
+    PILLOW_AVAILABLE = True
+except ImportError:
+    PILLOW_AVAILABLE = False
+
+_executor = None
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn: forking a process that runs threads (scheduler, dispatcher) is unsafe
+        _executor = ProcessPoolExecutor(
+            max_workers=IMAGE_PIPELINE_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+class ImageVariantService:
+    """
+    Background pipeline for resized post images:
+    - After an upload, thumbnail and medium JPEGs are created in a process pool
+    - The variants are recorded on every post using that image (posts.image_variants)
+    - Variants of already processed content (same sha256) are reused without resizing
+    """
+
+    @staticmethod
+    def schedule(image_filename: str):
+        """Queue variant generation for a stored image. Never blocks the request."""
+        if not IMAGE_PIPELINE_ENABLED:
+            return
+        if not PILLOW_AVAILABLE:
+            logger.warning("Pillow is not installed, skipping image variants for %s", image_filename)
+            return
+
+        existing = {variant: variant_filename(image_filename, variant) for variant in IMAGE_VARIANT_SIZES}
+        if all(os.path.exists(os.path.join(UPLOAD_FOLDER, name)) for name in existing.values()):
+            ImageVariantService.record(image_filename, existing)
+            return
+
+        future = _get_executor().submit(generate_variants, UPLOAD_FOLDER, image_filename)
+        future.add_done_callback(lambda f: ImageVariantService._on_done(image_filename, f))
+
+    @staticmethod
+    def _on_done(image_filename: str, future):
+        try:
+            variants = future.result()
+        except Exception as e:
+            logger.error("Failed to create image variants for %s: %s", image_filename, str(e))
+            return
+        logger.info("Created image variants for %s: %s", image_filename, list(variants))
+        ImageVariantService.record(image_filename, variants)
+
+    @staticmethod
+    def record(image_filename: str, variants: dict):
+        """Store the variant filenames on all posts that use this image."""
+        db = SessionLocal()
+        try:
+            db.query(Post).filter(Post.image_filename == image_filename).update(
+                {Post.image_variants: variants}, synchronize_session=False
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error("Failed to record image variants for %s: %s", image_filename, str(e))
+        finally:
+            db.close()
+
+    @staticmethod
+    def pick(post, variant: str | None) -> str | None:
+        """Filename to serve for a post: the requested variant if it exists, else the original."""
+        if variant and variant != "original" and post.image_variants:
+            return post.image_variants.get(variant) or post.image_filename
+        return post.image_filename
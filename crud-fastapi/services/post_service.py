@@ -1,97 +1,152 @@
 # services/post_service.py
-import os
-import shutil
 from fastapi import UploadFile, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from starlette.concurrency import run_in_threadpool
 
 from models.user import User
 from models.post import Post
 from models.email_queue import EmailQueue
 from logger import logger
+from scheduler.email_dispatcher import publish_email_queued, wake_email_dispatcher
+from services.storage_service import StorageService
+from services.image_variant_service import ImageVariantService
 
-UPLOAD_FOLDER = "uploads"
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+# Pagination / streaming limits for post listings
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+STREAM_BATCH_SIZE = 500
+# Rows per multi-row INSERT when creating posts in bulk (all chunks share one transaction)
+POST_INSERT_CHUNK_SIZE = 1000
+
+POST_CREATED_SUBJECT = "Your post has been created"
 
 
 class PostService:
     """
     Service layer for handling post-related operations:
     - Create post with optional image upload
+    - Create many posts in one transaction
     - Update post & image
-    - Delete post & image file
-    - Retrieve posts
+    - Stream all posts
+    Paginated reads and deletes are on AsyncPostService.
     """
 
+    @staticmethod
+    def _get_user(user_id: int, db: Session) -> User:
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user:
+            logger.warning("Post creation failed: User %s not found", user_id)
+            raise HTTPException(status_code=404, detail="User not found")
+        return user
+
+    @staticmethod
+    def _insert_posts(user: User, rows: list[dict], db: Session) -> list:
+        """
+        Insert posts and their queued notification emails in the caller's transaction,
+        with multi-row INSERT ... RETURNING (no per-row flush or refresh).
+        Returns the inserted post rows; the caller commits.
+        """
+        created, queued = [], 0
+        for start in range(0, len(rows), POST_INSERT_CHUNK_SIZE):
+            chunk = [{**row, "user_id": user.id} for row in rows[start:start + POST_INSERT_CHUNK_SIZE]]
+            posts = db.execute(insert(Post).values(chunk).returning(*Post.__table__.c)).all()
+
+            # Emails are built from the returned (id, title) pairs, so row order does not matter
+            email_ids = db.execute(insert(EmailQueue).values([
+                {
+                    "to_email": user.email,
+                    "subject": POST_CREATED_SUBJECT,
+                    "body": f"Hello {user.username},\n\nYour new post titled '{post.title}' was created successfully.",
+                    "status": "PENDING",
+                    "post_id": post.id,
+                }
+                for post in posts
+            ]).returning(EmailQueue.id)).scalars().all()
+            created.extend(posts)
+            queued += len(email_ids)
+
+        publish_email_queued(db)
+        logger.info("Inserted %s posts and queued %s emails for user_id %s", len(created), queued, user.id)
+        return created
+
+    @staticmethod
+    def _discard_upload(filename: str | None):
+        """After a rollback: remove a file stored by StorageService.save() unless another post uses it."""
+        if filename:
+            StorageService.delete_file(filename)
+
     @staticmethod
     def create_post(user_id: int, post_data, db: Session, file: UploadFile | None = None):
         """
-        Create a new post:
+        Create a new post in a single transaction:
         - Validates user
         - Saves image (optional)
-        - Creates post record
-        - Queues an email notification
+        - Creates post record and queues an email notification
         """
         logger.info("Attempting to create post for user_id: %s", user_id)
 
-        # Validate user
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user:
-            logger.warning("Post creation failed: User %s not found", user_id)
-            raise HTTPException(status_code=404, detail="User not found")
+        user = PostService._get_user(user_id, db)
 
         image_filename = None
 
-        # Handle image upload
+        # Handle image upload (stored once per content, referenced in this transaction)
         if file:
             try:
-                image_filename = f"{user_id}_{file.filename}"
-                file_path = os.path.join(UPLOAD_FOLDER, image_filename)
-
-                with open(file_path, "wb") as buffer:
-                    shutil.copyfileobj(file.file, buffer)
-
+                image_filename = StorageService.save(file, db)
                 logger.info("Image saved for user_id %s as %s", user_id, image_filename)
+            except HTTPException:
+                db.rollback()
+                raise
             except Exception as e:
                 logger.error("Failed to save image for user_id %s: %s", user_id, str(e))
+                db.rollback()
                 raise HTTPException(status_code=500, detail="Failed to upload image")
 
-        # Create post
+        # Create post + queue email notification, committed together
         try:
-            new_post = Post(
-                **post_data.dict(),
-                user_id=user_id,
-                image_filename=image_filename
-            )
-            db.add(new_post)
+            [new_post] = PostService._insert_posts(user, [{**post_data.dict(), "image_filename": image_filename}], db)
             db.commit()
-            db.refresh(new_post)
-            logger.info("Post created successfully with post_id: %s", new_post.id)
+            logger.info("Post created successfully with post_id: %s, email queued", new_post.id)
         except Exception as e:
             logger.error("Database error while creating post for user_id %s: %s", user_id, str(e))
             db.rollback()
+            PostService._discard_upload(image_filename)
             raise HTTPException(status_code=500, detail="Failed to create post")
 
-        # Queue email notification
+        # Dispatch right away instead of waiting for the next sweep
+        wake_email_dispatcher()
+
+        # Resized variants are created in the background and recorded on the post
+        if image_filename:
+            ImageVariantService.schedule(image_filename)
+
+        return new_post
+
+    @staticmethod
+    def create_posts_bulk(user_id: int, posts_data: list, db: Session):
+        """
+        Create many posts (without images) for one user:
+        - One user lookup
+        - Posts and their queued emails written with multi-row INSERT ... RETURNING
+        - All or nothing: a single commit
+        """
+        logger.info("Attempting to create %s posts for user_id: %s", len(posts_data), user_id)
+
+        user = PostService._get_user(user_id, db)
+
         try:
-            email_subject = "Your post has been created"
-            email_body = f"Hello {user.username},\n\nYour new post titled '{new_post.title}' was created successfully."
-
-            email_job = EmailQueue(
-                to_email=user.email,
-                subject=email_subject,
-                body=email_body,
-                status="PENDING",
-                post_id=new_post.id
-            )
-            db.add(email_job)
+            created = PostService._insert_posts(user, [post_data.dict() for post_data in posts_data], db)
             db.commit()
-            logger.info("Email queued for user_id %s regarding post_id %s", user_id, new_post.id)
+            logger.info("Created %s posts for user_id %s, emails queued", len(created), user_id)
         except Exception as e:
-            logger.error("Failed to queue email for post_id %s: %s", new_post.id, str(e))
+            logger.error("Database error while bulk creating posts for user_id %s: %s", user_id, str(e))
             db.rollback()
-            raise HTTPException(status_code=500, detail="Failed to queue email")
+            raise HTTPException(status_code=500, detail="Failed to create posts")
 
-        return new_post
+        wake_email_dispatcher()
+        return created
 
     @staticmethod
     def update_post(post_id: int, post_data, db: Session, file: UploadFile | None = None):
@@ -112,27 +167,32 @@ class PostService:
         post.content = post_data.content
 
         # Handle image update
+        new_filename = None
+        old_unreferenced = None
         if file:
             try:
-                # Delete old image
-                if post.image_filename:
-                    old_path = os.path.join(UPLOAD_FOLDER, post.image_filename)
-                    if os.path.exists(old_path):
-                        os.remove(old_path)
-                        logger.info("Deleted old image for post_id %s", post_id)
-
-                # Save new image
-                new_filename = f"{post.user_id}_{file.filename}"
-                file_path = os.path.join(UPLOAD_FOLDER, new_filename)
-
-                with open(file_path, "wb") as buffer:
-                    shutil.copyfileobj(file.file, buffer)
-
+                # Save new image, then drop this post's reference to the old one
+                new_filename = StorageService.save(file, db)
+                if post.image_filename and post.image_filename != new_filename:
+                    if StorageService.release(post.image_filename, db):
+                        old_unreferenced = post.image_filename
+                elif post.image_filename == new_filename:
+                    # Same content re-uploaded: keep a single reference
+                    StorageService.release(new_filename, db)
+
+                if post.image_filename != new_filename:
+                    post.image_variants = None
                 post.image_filename = new_filename
                 logger.info("Updated image for post_id %s to %s", post_id, new_filename)
 
+            except HTTPException:
+                db.rollback()
+                PostService._discard_upload(new_filename)
+                raise
             except Exception as e:
                 logger.error("Failed to update image for post_id %s: %s", post_id, str(e))
+                db.rollback()
+                PostService._discard_upload(new_filename)
                 raise HTTPException(status_code=500, detail="Failed to update image")
 
         # Save updated post
@@ -143,65 +203,116 @@ class PostService:
         except Exception as e:
             logger.error("Database error while updating post_id %s: %s", post_id, str(e))
             db.rollback()
+            PostService._discard_upload(new_filename)
             raise HTTPException(status_code=500, detail="Failed to update post")
 
+        # Remove the old file only once no committed post refers to it
+        if old_unreferenced:
+            StorageService.delete_file(old_unreferenced)
+            logger.info("Deleted old image for post_id %s", post_id)
+
+        if file and not post.image_variants:
+            ImageVariantService.schedule(post.image_filename)
+
         return post
 
     @staticmethod
-    def delete_post(post_id: int, db: Session):
+    def iter_posts(db: Session, user_id: int | None = None, batch_size: int = STREAM_BATCH_SIZE):
         """
-        Delete a post:
-        - Deletes associated image (if exists)
-        - Removes post record
+        Iterate over all posts through a server-side cursor:
+        - Rows are fetched `batch_size` at a time (yield_per)
+        - Only one batch is held in memory at once
         """
-        logger.info("Deleting post_id: %s", post_id)
+        logger.info("Streaming posts: user_id=%s, batch_size=%s", user_id, batch_size)
 
-        post = db.query(Post).filter(Post.id == post_id).first()
-        if not post:
-            logger.warning("Delete failed: post_id %s not found", post_id)
-            raise HTTPException(status_code=404, detail="Post not found")
+        query = db.query(Post)
+        if user_id is not None:
+            query = query.filter(Post.user_id == user_id)
 
-        # Remove image file
-        if post.image_filename:
-            try:
-                file_path = os.path.join(UPLOAD_FOLDER, post.image_filename)
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-                    logger.info("Image deleted for post_id %s", post_id)
-            except Exception as e:
-                logger.error("Failed to delete image for post_id %s: %s", post_id, str(e))
-                raise HTTPException(status_code=500, detail="Failed to delete post image")
+        yield from query.order_by(Post.id).yield_per(batch_size)
 
-        # Delete post
-        try:
-            db.delete(post)
-            db.commit()
-            logger.info("Post deleted successfully: post_id %s", post_id)
-        except Exception as e:
-            logger.error("Database error while deleting post_id %s: %s", post_id, str(e))
-            db.rollback()
-            raise HTTPException(status_code=500, detail="Failed to delete post")
 
-        return post
+class AsyncPostService:
+    """
+    Async counterpart of PostService for `async def` endpoints.
+    Covers the read and delete paths; create/update with image uploads stay on PostService.
+    """
 
     @staticmethod
-    def get_all_posts(db: Session):
+    async def get_posts_page(db: AsyncSession, limit: int = DEFAULT_PAGE_SIZE, after: int | None = None,
+                             user_id: int | None = None):
         """
-        Retrieve all posts.
+        Retrieve one page of posts using keyset (cursor) pagination:
+        - Posts are ordered by id, so the primary key index drives the scan
+        - `after` is the last post id of the previous page (exclusive)
+        - Optional `user_id` filter
+        Returns (posts, next_cursor); next_cursor is None on the last page.
         """
-        logger.info("Fetching all posts")
-        return db.query(Post).all()
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        logger.info("Fetching posts page: after=%s, limit=%s, user_id=%s", after, limit, user_id)
+
+        stmt = select(Post)
+        if user_id is not None:
+            stmt = stmt.where(Post.user_id == user_id)
+        if after is not None:
+            stmt = stmt.where(Post.id > after)
+
+        # Fetch one extra row to know whether another page exists
+        result = await db.execute(stmt.order_by(Post.id).limit(limit + 1))
+        posts = result.scalars().all()
+        next_cursor = None
+        if len(posts) > limit:
+            posts = posts[:limit]
+            next_cursor = posts[-1].id
+
+        return posts, next_cursor
 
     @staticmethod
-    def get_post_by_id(post_id: int, db: Session):
+    async def get_post_by_id(post_id: int, db: AsyncSession):
         """
         Retrieve a single post by ID.
         """
         logger.info("Fetching post_id: %s", post_id)
 
-        post = db.query(Post).filter(Post.id == post_id).first()
+        post = await db.get(Post, post_id)
         if not post:
             logger.warning("Post not found: post_id %s", post_id)
             raise HTTPException(status_code=404, detail="Post not found")
 
         return post
+
+    @staticmethod
+    async def delete_post(post_id: int, db: AsyncSession):
+        """
+        Delete a post:
+        - Deletes associated image (if exists)
+        - Removes post record
+        """
+        logger.info("Deleting post_id: %s", post_id)
+
+        # The email_queue cascade must be loaded up front; lazy loads are not allowed on AsyncSession
+        result = await db.execute(
+            select(Post).options(selectinload(Post.email_queue)).where(Post.id == post_id)
+        )
+        post = result.scalars().first()
+        if not post:
+            logger.warning("Delete failed: post_id %s not found", post_id)
+            raise HTTPException(status_code=404, detail="Post not found")
+
+        # Delete post and drop its image reference in one transaction
+        try:
+            unreferenced = post.image_filename and await StorageService.release_async(post.image_filename, db)
+            await db.delete(post)
+            await db.commit()
+            logger.info("Post deleted successfully: post_id %s", post_id)
+        except Exception as e:
+            logger.error("Database error while deleting post_id %s: %s", post_id, str(e))
+            await db.rollback()
+            raise HTTPException(status_code=500, detail="Failed to delete post")
+
+        # Remove image file once no other post shares it
+        if unreferenced:
+            await run_in_threadpool(StorageService.delete_file, post.image_filename)
+            logger.info("Image deleted for post_id %s", post_id)
+
+        return post
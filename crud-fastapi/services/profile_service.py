@@ -1,3 +1,5 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from models.user import User
 from models.user_profile import UserProfile
@@ -114,3 +116,116 @@ class ProfileService:
             raise HTTPException(status_code=500, detail="Failed to delete profile")
 
         return profile
+
+
+class AsyncProfileService:
+    """
+    Async counterpart of ProfileService for `async def` endpoints.
+    Same behaviour, but awaits the database through an AsyncSession.
+    """
+
+    @staticmethod
+    async def create_profile(user_id: int, profile_data, db: AsyncSession):
+        """
+        Create a new profile for a user:
+        - Validates if user exists
+        - Ensures profile does not already exist
+        - Saves profile in database
+        """
+        logger.info("Creating profile for user_id: %s", user_id)
+
+        user = await db.get(User, user_id)
+        if not user:
+            logger.warning("Profile creation failed: user_id %s not found", user_id)
+            raise HTTPException(status_code=404, detail="User not found")
+
+        # Lazy relationship loading is not available on AsyncSession, so query the profile directly
+        result = await db.execute(select(UserProfile.id).where(UserProfile.user_id == user_id))
+        if result.first():
+            logger.warning("Profile creation failed: profile already exists for user_id %s", user_id)
+            raise HTTPException(status_code=400, detail="Profile already exists")
+
+        new_profile = UserProfile(**profile_data.dict(), user_id=user_id)
+
+        try:
+            db.add(new_profile)
+            await db.commit()
+            await db.refresh(new_profile)
+            logger.info("Profile created successfully for user_id: %s", user_id)
+        except Exception as e:
+            logger.error("Database error while creating profile for user_id %s: %s", user_id, str(e))
+            await db.rollback()
+            raise HTTPException(status_code=500, detail="Failed to create profile")
+
+        return new_profile
+
+    @staticmethod
+    async def get_profile(user_id: int, db: AsyncSession):
+        """
+        Retrieve a user's profile by user_id.
+        """
+        logger.info("Fetching profile for user_id: %s", user_id)
+
+        result = await db.execute(select(UserProfile).where(UserProfile.user_id == user_id))
+        profile = result.scalars().first()
+        if not profile:
+            logger.warning("Profile not found for user_id: %s", user_id)
+            raise HTTPException(status_code=404, detail="Profile not found")
+
+        logger.info("Profile fetched successfully for user_id: %s", user_id)
+        return profile
+
+    @staticmethod
+    async def update_profile(user_id: int, profile_data, db: AsyncSession):
+        """
+        Update existing user profile:
+        - Validates profile existence
+        - Updates only provided fields (partial update)
+        """
+        logger.info("Updating profile for user_id: %s", user_id)
+
+        result = await db.execute(select(UserProfile).where(UserProfile.user_id == user_id))
+        profile = result.scalars().first()
+        if not profile:
+            logger.warning("Update failed: profile not found for user_id %s", user_id)
+            raise HTTPException(status_code=404, detail="Profile not found")
+
+        # Update only the fields provided in the request
+        update_fields = profile_data.dict(exclude_unset=True)
+        for key, value in update_fields.items():
+            setattr(profile, key, value)
+
+        try:
+            await db.commit()
+            await db.refresh(profile)
+            logger.info("Profile updated successfully for user_id: %s", user_id)
+        except Exception as e:
+            logger.error("Database error while updating profile for user_id %s: %s", user_id, str(e))
+            await db.rollback()
+            raise HTTPException(status_code=500, detail="Failed to update profile")
+
+        return profile
+
+    @staticmethod
+    async def delete_profile(user_id: int, db: AsyncSession):
+        """
+        Delete a user profile from the database.
+        """
+        logger.info("Deleting profile for user_id: %s", user_id)
+
+        result = await db.execute(select(UserProfile).where(UserProfile.user_id == user_id))
+        profile = result.scalars().first()
+        if not profile:
+            logger.warning("Delete failed: profile not found for user_id %s", user_id)
+            raise HTTPException(status_code=404, detail="Profile not found")
+
+        try:
+            await db.delete(profile)
+            await db.commit()
+            logger.info("Profile deleted successfully for user_id: %s", user_id)
+        except Exception as e:
+            logger.error("Database error while deleting profile for user_id %s: %s", user_id, str(e))
+            await db.rollback()
+            raise HTTPException(status_code=500, detail="Failed to delete profile")
+
+        return profile
@@ -0,0 +1,163 @@
+# services/storage_service.py
+import os
+import re
+import hashlib
+import tempfile
+from dotenv import load_dotenv
+from fastapi import UploadFile, HTTPException
+from sqlalchemy import update, delete, select, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models.stored_file import StoredFile
+from logger import logger
+from utils.image_variants import IMAGE_VARIANT_SIZES, variant_filename
+
+load_dotenv()
+
+UPLOAD_FOLDER = "uploads"
+os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", 10 * 1024 * 1024))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Room for multipart boundaries and other form fields on top of the file itself
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+
+_EXTENSION_RE = re.compile(r"^\.[a-z0-9]{1,10}$")
+
+
+class StorageService:
+    """
+    Content-addressed storage for uploaded post images:
+    - Uploads are copied in chunks while being hashed; the size limit is enforced during the copy
+    - Each distinct content is stored once as "<sha256><ext>"
+    - stored_files.ref_count tracks how many posts use a file; the file is removed when it drops to 0
+    - save() and delete_file() serialise on a per-file advisory lock, so a file being re-referenced
+      is never unlinked underneath the new post
+    Runs in the threadpool (sync endpoints), so the copy never blocks the event loop.
+    """
+
+    @staticmethod
+    def _extension(filename: str | None) -> str:
+        ext = os.path.splitext(filename or "")[1].lower()
+        return ext if _EXTENSION_RE.match(ext) else ""
+
+    @staticmethod
+    def save(file: UploadFile, db: Session) -> str:
+        """
+        Store an upload and take a reference on it. Returns the stored filename.
+        The reference is part of the caller's transaction; the caller commits.
+        """
+        digest = hashlib.sha256()
+        size = 0
+
+        fd, tmp_path = tempfile.mkstemp(dir=UPLOAD_FOLDER, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as buffer:
+                while chunk := file.file.read(UPLOAD_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > UPLOAD_MAX_BYTES:
+                        raise HTTPException(
+                            status_code=413, detail=f"File too large (max {UPLOAD_MAX_BYTES} bytes)"
+                        )
+                    digest.update(chunk)
+                    buffer.write(chunk)
+
+            content_hash = digest.hexdigest()
+            filename = f"{content_hash}{StorageService._extension(file.filename)}"
+            final_path = os.path.join(UPLOAD_FOLDER, filename)
+
+            # Reference first, under the file lock (held until the caller's transaction ends):
+            # a concurrent delete_file() either finished unlinking already or will see the reference
+            StorageService._lock_file(filename, db)
+            stmt = insert(StoredFile).values(
+                filename=filename, content_hash=content_hash, size=size, ref_count=1
+            ).on_conflict_do_update(
+                index_elements=[StoredFile.filename],
+                set_={"ref_count": StoredFile.ref_count + 1},
+            )
+            db.execute(stmt)
+
+            if os.path.exists(final_path):
+                logger.info("Upload %s already stored, reusing it", filename)
+                os.remove(tmp_path)
+            else:
+                os.replace(tmp_path, final_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        return filename
+
+    @staticmethod
+    def _lock_file(filename: str, db: Session):
+        # Transaction-scoped Postgres advisory lock keyed by the stored filename
+        db.execute(select(func.pg_advisory_xact_lock(func.hashtext(filename))))
+
+    @staticmethod
+    def _release_stmt(filename: str):
+        return (
+            update(StoredFile)
+            .where(StoredFile.filename == filename)
+            .values(ref_count=StoredFile.ref_count - 1)
+            .returning(StoredFile.ref_count)
+        )
+
+    @staticmethod
+    def _delete_stmt(filename: str):
+        return delete(StoredFile).where(StoredFile.filename == filename, StoredFile.ref_count <= 0)
+
+    @staticmethod
+    def release(filename: str, db: Session) -> bool:
+        """
+        Drop one reference to a stored file (in the caller's transaction).
+        Returns True when nothing uses the file any more; call delete_file() after committing.
+        Files saved before content addressing have no stored_files row and are always deletable.
+        """
+        remaining = db.execute(StorageService._release_stmt(filename)).scalar()
+        if remaining is None:
+            return True
+        if remaining <= 0:
+            db.execute(StorageService._delete_stmt(filename))
+            return True
+        return False
+
+    @staticmethod
+    async def release_async(filename: str, db: AsyncSession) -> bool:
+        """AsyncSession version of release()."""
+        remaining = (await db.execute(StorageService._release_stmt(filename))).scalar()
+        if remaining is None:
+            return True
+        if remaining <= 0:
+            await db.execute(StorageService._delete_stmt(filename))
+            return True
+        return False
+
+    @staticmethod
+    def delete_file(filename: str):
+        """
+        Remove a stored file and its resized variants from disk, ignoring files that are already gone.
+        Call it after the transaction that dropped the last reference (or that rolled back a save())
+        has ended. The file is kept if a post has referenced it again in the meantime.
+        """
+        with SessionLocal() as db:
+            StorageService._lock_file(filename, db)
+            if db.get(StoredFile, filename) is not None:
+                logger.info("Upload %s is referenced again, keeping it", filename)
+                db.rollback()
+                return
+
+            paths = [filename] + [variant_filename(filename, variant) for variant in IMAGE_VARIANT_SIZES]
+            for path in paths:
+                try:
+                    os.remove(os.path.join(UPLOAD_FOLDER, path))
+                    logger.info("Deleted unreferenced upload %s", path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.error("Failed to delete upload %s: %s", path, str(e))
+            # Releases the lock only after the files are gone
+            db.commit()
@@ -1,59 +1,274 @@
+import os
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 import requests
 import json
+from dotenv import load_dotenv
+from jose import jwt, JWTError
+from requests.adapters import HTTPAdapter
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from models.task_messages import TaskMessages
 from fastapi import HTTPException
 from logger import logger
+from utils.metrics import OUTBOUND_REQUEST_DURATION
+from utils.single_flight import SingleFlight
+from utils.ttl_cache import TTLCache
+
+load_dotenv()
+
+TASK_API_CONNECT_TIMEOUT = float(os.getenv("TASK_API_CONNECT_TIMEOUT", 3))
+TASK_API_READ_TIMEOUT = float(os.getenv("TASK_API_READ_TIMEOUT", 15))
+TASK_API_POOL_SIZE = int(os.getenv("TASK_API_POOL_SIZE", 10))
+# Refresh a cached token this many seconds before it expires
+TASK_API_TOKEN_REFRESH_MARGIN = int(os.getenv("TASK_API_TOKEN_REFRESH_MARGIN", 60))
+# Lifetime assumed for tokens without an `exp` claim
+TASK_API_TOKEN_DEFAULT_TTL = int(os.getenv("TASK_API_TOKEN_DEFAULT_TTL", 300))
+# Also store messages as JSONB so single messages/replies can be read without the whole blob
+TASK_MESSAGES_STORE_JSONB = os.getenv("TASK_MESSAGES_STORE_JSONB", "true").lower() == "true"
+# Account used to log in to the task API (required by the task messages endpoints and sync job)
+TASK_API_USERNAME = os.getenv("TASK_API_USERNAME") or None
+# Parallel messages calls during a batch sync
+TASK_MESSAGES_SYNC_CONCURRENCY = int(os.getenv("TASK_MESSAGES_SYNC_CONCURRENCY", 8))
+
+# One pooled keep-alive session for the login and messages calls.
+# verify=False matches the previous per-call behaviour for this upstream's certificate.
+task_api_session = requests.Session()
+task_api_session.verify = False
+task_api_session.mount("https://", HTTPAdapter(
+    pool_connections=1, pool_maxsize=max(TASK_API_POOL_SIZE, TASK_MESSAGES_SYNC_CONCURRENCY)
+))
+
+# username -> JWT from the login API; each entry expires shortly before the token does
+token_cache = TTLCache(max_size=256, ttl=TASK_API_TOKEN_DEFAULT_TTL)
+# Concurrent requests for one username share a single login call
+token_login_flight = SingleFlight()
+
+def content_hash(messages: list) -> str:
+    """sha256 of the canonical JSON form, stable across key order and whitespace."""
+    canonical = json.dumps(messages, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+def to_row(task_id: int, messages: list) -> dict:
+    """Column values for one task's filtered messages."""
+    return {
+        "task_id": task_id,
+        "messages_blob": json.dumps(messages),
+        "content_hash": content_hash(messages),
+        "messages": messages if TASK_MESSAGES_STORE_JSONB else None,
+    }
 
 class TaskMessagesService:
 
     LOGIN_URL = "https://iot.electems.com/task/api/api/auth/users"
     TARGET_URL = "https://iot.electems.com/task/api/messages"
+    TIMEOUT = (TASK_API_CONNECT_TIMEOUT, TASK_API_READ_TIMEOUT)
 
     @staticmethod
-    def fetch_messages(username: str, task_id: int, db: Session):
+    def _login(username: str) -> str:
+        """Get a JWT token from the login API and cache it until shortly before it expires."""
+        login_payload = {"username": username}
+        with OUTBOUND_REQUEST_DURATION.time(target="task_api", operation="login"):
+            login_resp = task_api_session.post(
+                TaskMessagesService.LOGIN_URL, json=login_payload, timeout=TaskMessagesService.TIMEOUT
+            )
+        login_resp.raise_for_status()
+        token = login_resp.json().get("token")
+        if not token:
+            raise HTTPException(status_code=401, detail="Failed to get JWT token")
+
+        ttl = TASK_API_TOKEN_DEFAULT_TTL
         try:
-            #Get JWT token from login API
-            login_payload = {"username": username}
-            login_resp = requests.post(TaskMessagesService.LOGIN_URL, json=login_payload,verify=False)
-            login_resp.raise_for_status()
-            token = login_resp.json().get("token")
-            if not token:
-                raise HTTPException(status_code=401, detail="Failed to get JWT token")
+            exp = jwt.get_unverified_claims(token).get("exp")
+            if exp:
+                ttl = exp - time.time()
+        except JWTError:
+            logger.warning("Task API token for %s is not a readable JWT, caching for %ss", username, ttl)
 
-            headers = {"Authorization": f"Bearer {token}"}
+        ttl -= TASK_API_TOKEN_REFRESH_MARGIN
+        if ttl > 0:
+            token_cache.set(username, token, ttl=ttl)
+        return token
+
+    @staticmethod
+    def get_token(username: str, force_refresh: bool = False) -> str:
+        """Return a cached token for `username`, logging in only when none is valid."""
+        if force_refresh:
+            token_cache.invalidate(username)
+        else:
+            token = token_cache.get(username)
+            if token:
+                return token
 
-            # Call target messages API
-            messages_resp = requests.get(f"{TaskMessagesService.TARGET_URL}?taskId={task_id}", headers=headers,verify=False)
-            messages_resp.raise_for_status()
-            messages_data = messages_resp.json()
+        logger.info("Logging in to task API as %s", username)
+        return token_login_flight.do(username, lambda: TaskMessagesService._login(username))
+
+    @staticmethod
+    def _get_messages(username: str, task_id: int) -> list:
+        """Call the messages API, re-authenticating once if the cached token is rejected."""
+        url = f"{TaskMessagesService.TARGET_URL}?taskId={task_id}"
+
+        def get(token):
+            with OUTBOUND_REQUEST_DURATION.time(target="task_api", operation="messages"):
+                return task_api_session.get(
+                    url, headers={"Authorization": f"Bearer {token}"}, timeout=TaskMessagesService.TIMEOUT
+                )
+
+        messages_resp = get(TaskMessagesService.get_token(username))
+        if messages_resp.status_code == 401:
+            logger.info("Task API rejected cached token for %s, logging in again", username)
+            messages_resp = get(TaskMessagesService.get_token(username, force_refresh=True))
+
+        messages_resp.raise_for_status()
+        return messages_resp.json()
+
+    @staticmethod
+    def fetch_messages(username: str, task_id: int, db: Session):
+        try:
+            # Call target messages API (login only when no cached token is valid)
+            messages_data = TaskMessagesService._get_messages(username, task_id)
 
             #  Filter response: only save messages with non-empty replies
             filtered_messages = [m for m in messages_data if m.get("replies")]
 
             if not filtered_messages:
-                logger.info(f"No messages with replies found for task_id={task_id}")
+                logger.info("No messages with replies found for task_id=%s", task_id)
                 return None
 
-            # Save to DB as JSON string
-            messages_json_str = json.dumps(filtered_messages)
+            # Save to DB as JSON string (plus hash and optional JSONB copy)
+            row = to_row(task_id, filtered_messages)
 
             # Check if task_id already exists
             existing = db.query(TaskMessages).filter(TaskMessages.task_id == task_id).first()
             if existing:
-                existing.messages_blob = messages_json_str
+                if existing.content_hash == row["content_hash"]:
+                    logger.info("Messages unchanged for task_id=%s, skipping update", task_id)
+                    return existing
+                for key, value in row.items():
+                    setattr(existing, key, value)
                 db.commit()
                 db.refresh(existing)
-                logger.info(f"Updated messages for task_id={task_id}")
+                logger.info("Updated messages for task_id=%s", task_id)
                 return existing
 
-            new_record = TaskMessages(task_id=task_id, messages_blob=messages_json_str)
+            new_record = TaskMessages(**row)
             db.add(new_record)
             db.commit()
             db.refresh(new_record)
-            logger.info(f"Saved messages for task_id={task_id}")
+            logger.info("Saved messages for task_id=%s", task_id)
             return new_record
 
         except requests.RequestException as e:
-            logger.error(f"HTTP error while fetching messages: {e}")
+            logger.error("HTTP error while fetching messages: %s", e)
             raise HTTPException(status_code=500, detail="Failed to fetch messages")
+
+    @staticmethod
+    def bulk_fetch_messages(username: str, task_ids: list[int], db: Session,
+                            concurrency: int = TASK_MESSAGES_SYNC_CONCURRENCY):
+        """
+        Sync messages for many tasks at once:
+        - Fetches tasks concurrently (at most `concurrency` calls in flight, one shared token)
+        - Keeps only messages with non-empty replies
+        - Upserts every task with replies in a single INSERT ... ON CONFLICT DO UPDATE,
+          skipping rows whose content hash did not change
+        Returns a per-task report: SAVED, UNCHANGED, NO_REPLIES or FAILED.
+        """
+        task_ids = list(dict.fromkeys(task_ids))
+        logger.info("Starting batch sync of %s tasks (concurrency=%s)", len(task_ids), concurrency)
+
+        def fetch(task_id):
+            try:
+                return task_id, TaskMessagesService._get_messages(username, task_id), None
+            except HTTPException as e:
+                return task_id, None, e.detail
+            except Exception as e:
+                return task_id, None, str(e)
+
+        results = {}
+        rows = []
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(task_ids) or 1))) as executor:
+            for task_id, messages_data, error in executor.map(fetch, task_ids):
+                if error:
+                    logger.error("Failed to fetch messages for task_id=%s: %s", task_id, error)
+                    results[task_id] = {"task_id": task_id, "status": "FAILED", "error": error}
+                    continue
+
+                filtered_messages = [m for m in messages_data if m.get("replies")]
+                if not filtered_messages:
+                    results[task_id] = {"task_id": task_id, "status": "NO_REPLIES", "error": None}
+                    continue
+
+                rows.append(to_row(task_id, filtered_messages))
+
+        if rows:
+            try:
+                stmt = insert(TaskMessages).values(rows)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[TaskMessages.task_id],
+                    set_={
+                        "messages_blob": stmt.excluded.messages_blob,
+                        "content_hash": stmt.excluded.content_hash,
+                        "messages": stmt.excluded.messages,
+                    },
+                    # Unchanged payloads are not rewritten (and not returned below)
+                    where=TaskMessages.content_hash.is_distinct_from(stmt.excluded.content_hash),
+                ).returning(TaskMessages.task_id)
+                written = {task_id for (task_id,) in db.execute(stmt)}
+                db.commit()
+
+                for row in rows:
+                    status = "SAVED" if row["task_id"] in written else "UNCHANGED"
+                    results[row["task_id"]] = {"task_id": row["task_id"], "status": status, "error": None}
+            except Exception as e:
+                logger.error("Database error while saving messages for %s tasks: %s", len(rows), str(e))
+                db.rollback()
+                for row in rows:
+                    results[row["task_id"]] = {"task_id": row["task_id"], "status": "FAILED",
+                                               "error": "Failed to save messages"}
+
+        report = [results[task_id] for task_id in task_ids]
+        saved = sum(1 for item in report if item["status"] == "SAVED")
+        failed = sum(1 for item in report if item["status"] == "FAILED")
+        logger.info("Batch task sync finished: %s saved, %s failed", saved, failed)
+
+        return {"total": len(report), "saved": saved, "failed": failed, "results": report}
+
+    @staticmethod
+    def _get_stored_messages(task_id: int, db: Session) -> list:
+        """Fallback for rows saved without the JSONB copy: parse the blob."""
+        blob = db.query(TaskMessages.messages_blob).filter(TaskMessages.task_id == task_id).scalar()
+        if blob is None:
+            raise HTTPException(status_code=404, detail="Task messages not found")
+        return json.loads(blob)
+
+    @staticmethod
+    def count_messages(task_id: int, db: Session) -> int:
+        """Number of stored messages for a task, computed in the database from the JSONB column."""
+        row = db.query(TaskMessages.id, func.jsonb_array_length(TaskMessages.messages)) \
+            .filter(TaskMessages.task_id == task_id).first()
+        if not row:
+            raise HTTPException(status_code=404, detail="Task messages not found")
+        if row[1] is None:
+            return len(TaskMessagesService._get_stored_messages(task_id, db))
+        return row[1]
+
+    @staticmethod
+    def get_message(task_id: int, index: int, db: Session):
+        """One stored message by position; only that element is read from the JSONB column."""
+        if index < 0:
+            raise HTTPException(status_code=404, detail="Message not found")
+
+        row = db.query(TaskMessages.id, TaskMessages.messages.is_(None), TaskMessages.messages[index]) \
+            .filter(TaskMessages.task_id == task_id).first()
+        if not row:
+            raise HTTPException(status_code=404, detail="Task messages not found")
+
+        _, no_jsonb, message = row
+        if no_jsonb:
+            messages = TaskMessagesService._get_stored_messages(task_id, db)
+            message = messages[index] if 0 <= index < len(messages) else None
+        if message is None:
+            raise HTTPException(status_code=404, detail="Message not found")
+        return message
@@ -1,18 +1,19 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from models.user import User
-from auth import hash_password, verify_password, create_jwt_token
+from auth import create_jwt_token, hash_password_async, verify_and_update_password_async
 from fastapi import HTTPException
 from logger import logger
 
 
-class UserService:
+class AsyncUserService:
     """
-    Service layer handling user-related operations such as registration and login.
-    Follows clean separation of concerns by keeping business logic outside controllers.
+    Service layer handling user-related operations such as registration and login, for `async def` endpoints.
+    Password hashing is CPU bound, so it runs in the auth process pool instead of on the event loop.
     """
 
     @staticmethod
-    def register_user(user_data, db: Session):
+    async def register_user(user_data, db: AsyncSession):
         """
         Register a new user:
         - Checks if username already exists
@@ -22,8 +23,8 @@ class UserService:
         logger.info("Attempting to register new user: %s", user_data.username)
 
         # Check if the username is already taken
-        existing_user = db.query(User).filter(User.username == user_data.username).first()
-        if existing_user:
+        result = await db.execute(select(User.id).where(User.username == user_data.username))
+        if result.first():
             logger.warning("Registration failed: username '%s' already exists", user_data.username)
             raise HTTPException(status_code=400, detail="Username already taken")
 
@@ -31,24 +32,24 @@ class UserService:
         new_user = User(
             username=user_data.username,
             email=user_data.email,
-            password=hash_password(user_data.password)
+            password=await hash_password_async(user_data.password)
         )
 
         # Commit new user to the database
         try:
             db.add(new_user)
-            db.commit()
-            db.refresh(new_user)
+            await db.commit()
+            await db.refresh(new_user)
             logger.info("User registered successfully: %s", new_user.username)
         except Exception as e:
             logger.error("Database error while registering user '%s': %s", user_data.username, str(e))
-            db.rollback()
+            await db.rollback()
             raise HTTPException(status_code=500, detail="Failed to register user")
 
         return new_user
 
     @staticmethod
-    def login_user(user_data, db: Session):
+    async def login_user(user_data, db: AsyncSession):
         """
         Authenticate user:
         - Validates username and password
@@ -57,15 +58,29 @@ class UserService:
         logger.info("Login attempt for username: %s", user_data.username)
 
         # Fetch user by username
-        db_user = db.query(User).filter(User.username == user_data.username).first()
+        result = await db.execute(select(User).where(User.username == user_data.username))
+        db_user = result.scalars().first()
 
         # Validate credentials
-        if not db_user or not verify_password(user_data.password, db_user.password):
+        valid, new_hash = (
+            await verify_and_update_password_async(user_data.password, db_user.password) if db_user else (False, None)
+        )
+        if not valid:
             logger.warning("Invalid login attempt for username: %s", user_data.username)
             raise HTTPException(status_code=401, detail="Invalid username or password")
 
+        # Re-hash with the current bcrypt cost; a failure here must not fail the login
+        if new_hash:
+            db_user.password = new_hash
+            try:
+                await db.commit()
+                logger.info("Re-hashed password with current cost for username: %s", db_user.username)
+            except Exception as e:
+                logger.error("Failed to store re-hashed password for '%s': %s", db_user.username, str(e))
+                await db.rollback()
+
         # Create JWT token
-        token = create_jwt_token({"username": db_user.username})
+        token = create_jwt_token({"username": db_user.username, "uid": db_user.id, "ver": db_user.token_version})
         logger.info("User logged in successfully: %s", db_user.username)
 
         return {"access_token": token, "token_type": "bearer"}
@@ -0,0 +1,6 @@
+# tests/conftest.py
+import os
+import tempfile
+
+# logger.py opens its log file at import; keep test runs from writing app.log into the source tree
+os.environ.setdefault("LOG_FILE", os.path.join(tempfile.gettempdir(), "crud_api_tests.log"))
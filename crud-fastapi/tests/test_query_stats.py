@@ -0,0 +1,62 @@
+# tests/test_query_stats.py
+import pytest
+from sqlalchemy import create_engine, text
+
+from utils.query_stats import QueryBudgetExceeded, instrument_engine, track_queries
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE posts (id INTEGER PRIMARY KEY, user_id INTEGER)"))
+        conn.execute(text("INSERT INTO posts (id, user_id) VALUES (1, 1), (2, 1), (3, 2), (4, 2), (5, 3)"))
+    yield engine
+    engine.dispose()
+
+
+def test_n_plus_one_loop_raises(engine):
+    with engine.connect() as conn:
+        with pytest.raises(QueryBudgetExceeded, match="possible N\\+1"):
+            with track_queries("posts by id", budget=100, repeat_threshold=3, mode="raise") as stats:
+                for post_id in range(1, 6):
+                    conn.execute(text(f"SELECT user_id FROM posts WHERE id = {post_id}")).scalar()
+
+    # The third repeat was stopped before it ran
+    assert stats.count == 2
+
+
+def test_over_budget_raises(engine):
+    with engine.connect() as conn:
+        with pytest.raises(QueryBudgetExceeded, match="more than 3 statements"):
+            with track_queries("request", budget=3, repeat_threshold=100, mode="raise") as stats:
+                conn.execute(text("SELECT COUNT(*) FROM posts")).scalar()
+                conn.execute(text("SELECT MAX(id) FROM posts")).scalar()
+                conn.execute(text("SELECT MIN(id) FROM posts")).scalar()
+                conn.execute(text("SELECT user_id FROM posts WHERE id = 1")).scalar()
+
+    assert stats.count == 3
+
+
+def test_within_budget_records_statements(engine):
+    with engine.connect() as conn:
+        with track_queries("request", budget=3, repeat_threshold=3, mode="raise") as stats:
+            conn.execute(text("SELECT user_id FROM posts WHERE id = 1")).scalar()
+            conn.execute(text("SELECT user_id FROM posts WHERE id = 2")).scalar()
+
+    assert stats.count == 2
+    assert stats.violations() == []
+    # Literals are replaced, so both statements share one shape
+    assert list(stats.shapes.values()) == [2]
+
+
+def test_failed_statement_does_not_break_later_timing(engine):
+    with engine.connect() as conn:
+        with track_queries("request", mode="raise") as stats:
+            with pytest.raises(Exception):
+                conn.execute(text("SELECT * FROM missing_table"))
+            conn.rollback()
+            conn.execute(text("SELECT COUNT(*) FROM posts")).scalar()
+
+    assert stats.count == 1
@@ -0,0 +1,32 @@
+# tests/test_ttl_cache.py
+from utils.ttl_cache import TTLCache
+
+
+def test_evicts_least_recently_used_by_total_bytes():
+    cache = TTLCache(max_size=10, ttl=60, max_bytes=10)
+    cache.set("a", b"1234")
+    cache.set("b", b"1234")
+    assert cache.get("a") == b"1234"  # "b" is now the least recently used
+    cache.set("c", b"1234")
+
+    assert cache.get("b") is None
+    assert cache.stats()["bytes"] == 8
+    assert cache.stats()["evictions"] == 1
+
+
+def test_value_larger_than_max_bytes_is_not_cached():
+    cache = TTLCache(max_size=10, ttl=60, max_bytes=10)
+    cache.set("a", b"1234")
+    cache.set("big", b"x" * 11)
+
+    assert cache.get("big") is None
+    assert cache.get("a") == b"1234"
+
+
+def test_replacing_and_invalidating_keep_the_byte_count():
+    cache = TTLCache(max_size=10, ttl=60, max_bytes=10)
+    cache.set("a", b"1234")
+    cache.set("a", b"12")
+    assert cache.stats()["bytes"] == 2
+    cache.invalidate("a")
+    assert cache.stats()["bytes"] == 0
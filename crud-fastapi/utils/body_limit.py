@@ -0,0 +1,54 @@
+# utils/body_limit.py
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+
+
+class MultipartSizeLimitMiddleware:
+    """
+    Pure ASGI middleware rejecting multipart (upload) request bodies over `max_bytes` with 413,
+    before Starlette spools them to a temporary file:
+    - A Content-Length above the limit is rejected without reading the body
+    - Bodies without Content-Length (chunked) are counted as they arrive and cut off at the limit
+    Other request types pass through untouched.
+    """
+
+    def __init__(self, app, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    def _too_large(self) -> HTTPException:
+        return HTTPException(status_code=413, detail=f"Request body too large (max {self.max_bytes} bytes)")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        if not headers.get(b"content-type", b"").startswith(b"multipart/"):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            content_length = int(headers.get(b"content-length", b""))
+        except ValueError:
+            content_length = None
+        if content_length is not None and content_length > self.max_bytes:
+            error = self._too_large()
+            response = JSONResponse({"detail": error.detail}, status_code=error.status_code)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Raised inside the form parser; FastAPI passes HTTPException through as the response
+                    raise self._too_large()
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -1,11 +1,14 @@
 # services/email_sender.py
 import smtplib
 import os
+import threading
 from email.message import EmailMessage
 from logger import logger
 from dotenv import load_dotenv
 from sqlalchemy.orm import Session
 from models.post import Post
+from utils.metrics import OUTBOUND_REQUEST_DURATION
+from utils.ttl_cache import TTLCache
 
 load_dotenv()  # Load .env variables
 
@@ -13,15 +16,153 @@ SENDER_EMAIL = os.getenv("SENDER_EMAIL")
 EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
 SMTP_SERVER = os.getenv("SMTP_SERVER")
 SMTP_PORT = int(os.getenv("SMTP_PORT", 587))
+# Set both to false to point at a local stand-in server (e.g. benchmarks/smtp_sink.py)
+SMTP_USE_TLS = os.getenv("SMTP_USE_TLS", "true").lower() == "true"
+SMTP_USE_AUTH = os.getenv("SMTP_USE_AUTH", "true").lower() == "true"
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", 30))
+# Reconnect after this many messages; many servers drop or throttle long-lived sessions
+SMTP_MAX_MESSAGES_PER_CONNECTION = int(os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", 100))
 
 UPLOAD_FOLDER = "uploads"  # Folder where post images are saved
 
+# Attachment bytes cached by (filename, mtime, size), so a batch reads each image from disk once.
+# A changed file gets a new mtime and therefore a new key; large files are never cached.
+# Bounded by entry count and by total bytes (per process).
+ATTACHMENT_CACHE_SIZE = int(os.getenv("ATTACHMENT_CACHE_SIZE", 32))
+ATTACHMENT_CACHE_MAX_BYTES = int(os.getenv("ATTACHMENT_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+ATTACHMENT_CACHE_TTL = float(os.getenv("ATTACHMENT_CACHE_TTL", 300))
+ATTACHMENT_CACHE_MAX_FILE_BYTES = int(os.getenv("ATTACHMENT_CACHE_MAX_FILE_BYTES", 2 * 1024 * 1024))
+
+attachment_cache = TTLCache(
+    max_size=ATTACHMENT_CACHE_SIZE, ttl=ATTACHMENT_CACHE_TTL, max_bytes=ATTACHMENT_CACHE_MAX_BYTES
+)
+
+
+class SMTPSession:
+    """
+    One authenticated SMTP connection reused for many messages:
+    - Connects (STARTTLS + login) lazily on the first send
+    - Reconnects after SMTP_MAX_MESSAGES_PER_CONNECTION messages
+    - Reconnects and retries once if the server dropped the connection
+    Not thread-safe: use one session per thread (see SMTPSessionPool).
+    """
+
+    def __init__(self, host: str = None, port: int = None, max_messages: int = None):
+        self.host = host or SMTP_SERVER
+        self.port = port or SMTP_PORT
+        self.max_messages = max_messages or SMTP_MAX_MESSAGES_PER_CONNECTION
+        self._server = None
+        self._sent_on_connection = 0
+
+    def _connect(self):
+        with OUTBOUND_REQUEST_DURATION.time(target="smtp", operation="connect"):
+            server = smtplib.SMTP(self.host, self.port, timeout=SMTP_TIMEOUT)
+            try:
+                if SMTP_USE_TLS:
+                    server.starttls()
+                if SMTP_USE_AUTH:
+                    server.login(SENDER_EMAIL, EMAIL_PASSWORD)
+            except Exception:
+                server.close()
+                raise
+        self._server = server
+        self._sent_on_connection = 0
+        logger.info("Opened SMTP connection to %s:%s", self.host, self.port)
+
+    def close(self):
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except Exception:
+            self._server.close()
+        finally:
+            self._server = None
+
+    def send_message(self, msg: EmailMessage):
+        if self._server is None or self._sent_on_connection >= self.max_messages:
+            self.close()
+            self._connect()
+
+        try:
+            with OUTBOUND_REQUEST_DURATION.time(target="smtp", operation="send"):
+                self._server.send_message(msg)
+        except (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError) as e:
+            # Connection went stale between messages: reconnect and retry once
+            logger.warning("SMTP connection lost (%s), reconnecting", e)
+            self.close()
+            self._connect()
+            with OUTBOUND_REQUEST_DURATION.time(target="smtp", operation="send"):
+                self._server.send_message(msg)
+
+        self._sent_on_connection += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class SMTPSessionPool:
+    """
+    Hands out one SMTPSession per thread, so a worker pool can send a whole batch
+    over a few connections. Call close_all() once the batch is done.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._sessions = []
+        self._lock = threading.Lock()
+
+    def get(self) -> SMTPSession:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = SMTPSession()
+            self._local.session = session
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def close_all(self):
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
+
+
+def read_attachment(filename: str) -> bytes | None:
+    """
+    Read an uploaded file for attaching, through the attachment cache.
+    Returns None if the file does not exist.
+    """
+    attachment_path = os.path.join(UPLOAD_FOLDER, filename)
+    try:
+        stat = os.stat(attachment_path)
+    except FileNotFoundError:
+        return None
+
+    key = (filename, stat.st_mtime_ns, stat.st_size)
+    file_data = attachment_cache.get(key)
+    if file_data is not None:
+        return file_data
+
+    with open(attachment_path, "rb") as f:
+        file_data = f.read()
+    if stat.st_size <= ATTACHMENT_CACHE_MAX_FILE_BYTES:
+        attachment_cache.set(key, file_data)
+    return file_data
+
+
 class EmailSender:
 
     @staticmethod
-    def send_email(to_email: str, subject: str, body: str, db: Session = None, post_id: int | None = None):
+    def send_email(to_email: str, subject: str, body: str, db: Session = None, post_id: int | None = None,
+                   smtp: SMTPSession | None = None, attachment_filename: str | None = None):
         """
         Send email. If post_id is provided, attach the post's image if available.
+        Callers that already loaded the post pass `attachment_filename` instead, which skips the Post lookup.
+        Pass an open `smtp` session to reuse its connection; otherwise a one-off connection is used.
         """
         try:
             msg = EmailMessage()
@@ -31,31 +172,32 @@ class EmailSender:
             msg.set_content(body)
 
             # Attach image from post if post_id is provided
-            if db and post_id:
+            if attachment_filename is None and db and post_id:
                 post = db.query(Post).filter(Post.id == post_id).first()
-                if post and post.image_filename:
-                    attachment_path = os.path.join(UPLOAD_FOLDER, post.image_filename)
-                    if os.path.exists(attachment_path):
-                        with open(attachment_path, "rb") as f:
-                            file_data = f.read()
-                            file_name = os.path.basename(attachment_path)
-                        msg.add_attachment(
-                            file_data,
-                            maintype="application",
-                            subtype="octet-stream",
-                            filename=file_name
-                        )
-                        logger.info(f"Added attachment to email: {file_name}")
+                if post:
+                    attachment_filename = post.image_filename
+
+            if attachment_filename:
+                file_data = read_attachment(attachment_filename)
+                if file_data is not None:
+                    msg.add_attachment(
+                        file_data,
+                        maintype="application",
+                        subtype="octet-stream",
+                        filename=os.path.basename(attachment_filename)
+                    )
+                    logger.info("Added attachment to email: %s", attachment_filename)
 
             # Send email via SMTP
-            with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-                server.starttls()
-                server.login(SENDER_EMAIL, EMAIL_PASSWORD)
-                server.send_message(msg)
-                logger.info(f"Email sent to {to_email}")
+            if smtp is not None:
+                smtp.send_message(msg)
+            else:
+                with SMTPSession() as session:
+                    session.send_message(msg)
+            logger.info("Email sent to %s", to_email)
 
             return True
 
         except Exception as e:
-            logger.error(f"Failed to send email: {e}")
+            logger.error("Failed to send email: %s", e)
             return False
@@ -0,0 +1,63 @@
+# utils/file_response.py
+import mimetypes
+import os
+import re
+import starlette
+from fastapi import Request, HTTPException
+from fastapi.responses import FileResponse, Response
+
+# FileResponse answers Range / If-Range requests itself only from Starlette 0.39 on;
+# older versions would silently send the whole file for every range request
+MIN_STARLETTE_VERSION = (0, 39)
+if tuple(int(part) for part in starlette.__version__.split(".")[:2]) < MIN_STARLETTE_VERSION:
+    raise RuntimeError(
+        f"starlette>={'.'.join(map(str, MIN_STARLETTE_VERSION))} is required for range requests, "
+        f"found {starlette.__version__}"
+    )
+
+_HEX64_RE = re.compile(r"^[0-9a-f]{64}")
+
+
+def file_etag(path: str) -> str:
+    """
+    Strong ETag for a stored file: content-addressed files (and their variants) start with
+    their sha256, which is used directly; other files fall back to mtime + size.
+    """
+    name = os.path.basename(path)
+    match = _HEX64_RE.match(name)
+    if match:
+        stem = os.path.splitext(name)[0]
+        return f'"{stem}"'
+    stat = os.stat(path)
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def cached_file_response(request: Request, path: str, cache_control: str) -> Response:
+    """
+    Serve a file with HTTP caching and partial downloads:
+    - ETag + If-None-Match -> 304 Not Modified
+    - everything else through FileResponse, which answers Range / If-Range itself (206, 416)
+      and sends full files and ranges alike with zero-copy sendfile when the server supports it
+    """
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    etag = file_etag(path)
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    # No byte of an empty file can be served
+    if request.headers.get("range") and os.path.getsize(path) == 0:
+        raise HTTPException(status_code=416, headers={"Content-Range": "bytes */0"})
+
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    return FileResponse(path, media_type=media_type, headers=headers)
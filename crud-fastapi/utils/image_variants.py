@@ -0,0 +1,43 @@
+# utils/image_variants.py
+# Runs inside the image process pool: keep imports light (no app / DB modules).
+import os
+
+# variant name -> bounding box; the aspect ratio is kept
+IMAGE_VARIANT_SIZES = {
+    "thumbnail": (200, 200),
+    "medium": (800, 800),
+}
+VARIANTS_SUBFOLDER = "variants"
+
+
+def variant_filename(image_filename: str, variant: str) -> str:
+    """Path of a variant relative to the uploads folder, e.g. variants/<sha256>_thumbnail.jpg"""
+    stem = os.path.splitext(os.path.basename(image_filename))[0]
+    return os.path.join(VARIANTS_SUBFOLDER, f"{stem}_{variant}.jpg")
+
+
+def generate_variants(upload_folder: str, image_filename: str) -> dict:
+    """
+    Create every variant of one uploaded image as an optimized JPEG.
+    Returns {variant name: filename relative to upload_folder}.
+    """
+    from PIL import Image, ImageOps
+
+    os.makedirs(os.path.join(upload_folder, VARIANTS_SUBFOLDER), exist_ok=True)
+    variants = {}
+
+    with Image.open(os.path.join(upload_folder, image_filename)) as source:
+        source = ImageOps.exif_transpose(source)
+        for variant, size in IMAGE_VARIANT_SIZES.items():
+            image = source.copy()
+            image.thumbnail(size)
+            if image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+
+            filename = variant_filename(image_filename, variant)
+            tmp_path = os.path.join(upload_folder, filename + ".tmp")
+            image.save(tmp_path, "JPEG", quality=85, optimize=True)
+            os.replace(tmp_path, os.path.join(upload_folder, filename))
+            variants[variant] = filename
+
+    return variants
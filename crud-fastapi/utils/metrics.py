@@ -0,0 +1,252 @@
+# utils/metrics.py
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from starlette.routing import Match
+
+# Histogram bucket upper bounds, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# p50 / p95 / p99 are computed over the most recent samples of each series
+QUANTILES = (0.5, 0.95, 0.99)
+QUANTILE_WINDOW = 1024
+
+_registry = []
+_registry_lock = threading.Lock()
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(label_names, label_values, extra: dict | None = None) -> str:
+    pairs = list(zip(label_names, label_values)) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Base for in-process metrics: one value per label combination, rendered in Prometheus text format."""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._series = {}
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(name, "") for name in self.label_names)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        with self._lock:
+            series = list(self._series.items())
+        for key, value in series:
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._series[self._key(labels)] = value
+
+
+class _LatencySeries:
+    __slots__ = ("bucket_counts", "count", "total", "recent")
+
+    def __init__(self, n_buckets: int):
+        self.bucket_counts = [0] * n_buckets
+        self.count = 0
+        self.total = 0.0
+        self.recent = deque(maxlen=QUANTILE_WINDOW)
+
+
+class LatencyMetric(_Metric):
+    """
+    Duration histogram (cumulative buckets, _sum, _count) plus a `<name>_quantile` gauge
+    with p50/p95/p99 over the last QUANTILE_WINDOW observations of each series.
+    If "outcome" is one of the labels, time() fills it with "ok" or "error".
+    """
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, seconds: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _LatencySeries(len(self.buckets))
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series.bucket_counts[i] += 1
+                    break
+            series.count += 1
+            series.total += seconds
+            series.recent.append(seconds)
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        outcome = "ok"
+        try:
+            yield
+        except BaseException:
+            outcome = "error"
+            raise
+        finally:
+            if "outcome" in self.label_names:
+                labels["outcome"] = outcome
+            self.observe(time.perf_counter() - start, **labels)
+
+    def quantiles(self, **labels) -> dict:
+        """{0.5: seconds, 0.95: ..., 0.99: ...} for one series (empty when it has no samples)."""
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            samples = sorted(series.recent) if series else []
+        return _quantiles(samples)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        quantile_lines = [
+            f"# HELP {self.name}_quantile {self.documentation} (last {QUANTILE_WINDOW} samples)",
+            f"# TYPE {self.name}_quantile gauge",
+        ]
+        with self._lock:
+            series = [
+                (key, list(s.bucket_counts), s.count, s.total, sorted(s.recent)) for key, s in self._series.items()
+            ]
+
+        for key, bucket_counts, count, total, samples in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.label_names, key, {"le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+
+            for q, value in _quantiles(samples).items():
+                labels = _format_labels(self.label_names, key, {"quantile": q})
+                quantile_lines.append(f"{self.name}_quantile{labels} {_format_value(value)}")
+
+        return lines + quantile_lines
+
+
+def _quantiles(samples: list) -> dict:
+    # Nearest-rank on already sorted samples
+    if not samples:
+        return {}
+    return {q: samples[min(len(samples) - 1, math.ceil(q * len(samples)) - 1)] for q in QUANTILES}
+
+
+def render_prometheus(extra_lines=()) -> str:
+    """Every registered metric in Prometheus text exposition format (version 0.0.4)."""
+    with _registry_lock:
+        metrics = list(_registry)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    lines.extend(extra_lines)
+    return "\n".join(lines) + "\n"
+
+
+# ------------------- Application metrics -------------------
+HTTP_REQUEST_DURATION = LatencyMetric(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route")
+)
+HTTP_REQUESTS_TOTAL = Counter(
+    "http_requests_total", "HTTP requests by route and status code", ("method", "route", "status")
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled", ("method", "route")
+)
+SCHEDULER_JOB_DURATION = LatencyMetric(
+    "scheduler_job_duration_seconds", "Background job run time", ("job", "outcome")
+)
+OUTBOUND_REQUEST_DURATION = LatencyMetric(
+    "outbound_request_duration_seconds", "Calls to external services (LiteAPI, task API, SMTP)",
+    ("target", "operation", "outcome")
+)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording per-route latency, in-flight requests and status codes.
+    Requests are labelled with the route template (e.g. /posts/{post_id}), never the raw path,
+    so the number of series stays bounded; unmatched paths share the "unmatched" label.
+    `router` is the application's router; its routes are read per request, so routers
+    included after the middleware was added are matched too.
+    """
+
+    def __init__(self, app, router):
+        self.app = app
+        self.router = router
+
+    def _route_template(self, scope) -> str:
+        for route in self.router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, "path", "unmatched")
+        return "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = self._route_template(scope)
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc(method=method, route=route)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, method=method, route=route)
+            HTTP_REQUESTS_TOTAL.inc(method=method, route=route, status=str(status_code))
+            HTTP_REQUESTS_IN_FLIGHT.dec(method=method, route=route)
@@ -0,0 +1,194 @@
+# utils/query_stats.py
+import contextvars
+import heapq
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dotenv import load_dotenv
+from sqlalchemy import event
+
+from logger import logger
+
+load_dotenv()
+
+# Statements one request may run before it is reported
+DB_QUERY_BUDGET = int(os.getenv("DB_QUERY_BUDGET", 25))
+# The same statement shape this many times in one request looks like an N+1 loop
+DB_QUERY_REPEAT_THRESHOLD = int(os.getenv("DB_QUERY_REPEAT_THRESHOLD", 5))
+# "log" (default), "raise" (for tests / CI: the offending statement raises QueryBudgetExceeded instead of running) or "off"
+DB_QUERY_BUDGET_MODE = os.getenv("DB_QUERY_BUDGET_MODE", "log").lower()
+# Single statements slower than this are logged
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", 200))
+# Slowest statements kept per request for the summary
+SLOWEST_STATEMENTS = 3
+
+_current_stats = contextvars.ContextVar("query_stats", default=None)
+
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised in "raise" mode when a request runs too many statements or repeats one too often."""
+
+
+def statement_shape(statement: str) -> str:
+    """Statement with literals replaced and whitespace collapsed, so repeats group together."""
+    return _WHITESPACE_RE.sub(" ", _LITERAL_RE.sub("?", statement)).strip()
+
+
+class QueryStats:
+    """
+    Statements run in one unit of work (normally an HTTP request):
+    - statement count and total time spent in the database
+    - how often each statement shape ran, to spot N+1 patterns
+    - the slowest statements
+    """
+
+    def __init__(self, label: str, budget: int = None, repeat_threshold: int = None, mode: str = None):
+        self.label = label
+        self.budget = DB_QUERY_BUDGET if budget is None else budget
+        self.repeat_threshold = DB_QUERY_REPEAT_THRESHOLD if repeat_threshold is None else repeat_threshold
+        self.mode = mode or DB_QUERY_BUDGET_MODE
+        self.count = 0
+        self.total_time = 0.0
+        self.shapes = Counter()
+        self.slowest = []  # min-heap of (seconds, statement)
+        self._lock = threading.Lock()
+
+    def check(self, shape: str):
+        """
+        In "raise" mode, raise QueryBudgetExceeded before a statement of this shape runs
+        if it would exceed the budget or reach the repeat threshold.
+        """
+        if self.mode != "raise":
+            return
+        with self._lock:
+            count = self.count + 1
+            repeats = self.shapes[shape] + 1
+        if count > self.budget:
+            raise QueryBudgetExceeded(f"{self.label} ran more than {self.budget} statements")
+        if repeats >= self.repeat_threshold:
+            raise QueryBudgetExceeded(
+                f"{self.label} ran the same statement {repeats} times (possible N+1): {shape[:500]}"
+            )
+
+    def record(self, shape: str, seconds: float):
+        with self._lock:
+            self.count += 1
+            self.total_time += seconds
+            self.shapes[shape] += 1
+            if len(self.slowest) < SLOWEST_STATEMENTS:
+                heapq.heappush(self.slowest, (seconds, shape))
+            elif seconds > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, (seconds, shape))
+
+        if seconds * 1000 >= DB_SLOW_QUERY_MS:
+            logger.warning("Slow query in %s (%.1f ms): %s", self.label, seconds * 1000, shape[:500])
+
+    def violations(self) -> list[str]:
+        problems = []
+        if self.count > self.budget:
+            problems.append(f"{self.count} statements (budget {self.budget})")
+        for shape, repeats in self.shapes.most_common():
+            if repeats < self.repeat_threshold:
+                break
+            problems.append(f"{repeats}x possible N+1: {shape[:300]}")
+        return problems
+
+    def summary(self) -> dict:
+        return {
+            "queries": self.count,
+            "db_time_ms": round(self.total_time * 1000, 1),
+            "slowest": [
+                {"ms": round(seconds * 1000, 1), "statement": shape[:300]}
+                for seconds, shape in sorted(self.slowest, reverse=True)
+            ],
+        }
+
+    def report(self):
+        """Log the summary; at WARNING with the violations when the budget was exceeded."""
+        if self.mode == "off":
+            return
+        problems = self.violations()
+        if problems:
+            logger.warning("Query budget exceeded in %s: %s", self.label, "; ".join(problems),
+                           extra=self.summary())
+        else:
+            logger.debug("%s ran %s statements in %.1f ms", self.label, self.count, self.total_time * 1000)
+
+
+def get_query_stats() -> QueryStats | None:
+    return _current_stats.get()
+
+
+@contextmanager
+def track_queries(label: str, **options):
+    """
+    Record every statement run in this context (threads started with run_in_threadpool
+    and the async engine's greenlets inherit it). Useful in tests:
+
+        with track_queries("create post", budget=5, mode="raise") as stats:
+            PostService.create_post(...)
+    """
+    stats = QueryStats(label, **options)
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+        stats.report()
+
+
+def instrument_engine(engine):
+    """
+    Time every statement on `engine` (a sync Engine, or AsyncEngine.sync_engine).
+    The start time and statement shape live on the statement's execution context, so a failed
+    statement (no after_cursor_execute) leaves nothing behind. In "raise" mode the budget is
+    checked before the statement runs, so the offending statement is never sent.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = _current_stats.get()
+        if stats is None or context is None:
+            return
+        shape = statement_shape(statement)
+        stats.check(shape)
+        context._query_stats = (shape, time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = _current_stats.get()
+        started = context and context.__dict__.pop("_query_stats", None)
+        if stats is None or not started:
+            return
+        shape, start = started
+        stats.record(shape, time.perf_counter() - start)
+
+
+class QueryStatsMiddleware:
+    """
+    Pure ASGI middleware: tracks the statements of each request, reports budget / N+1
+    violations and adds a Server-Timing header (db;dur=<ms>;desc="<n> queries").
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or DB_QUERY_BUDGET_MODE == "off":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                header = f'db;dur={stats.total_time * 1000:.1f};desc="{stats.count} queries"'
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", header.encode())]
+            await send(message)
+
+        with track_queries(f'{scope["method"]} {scope["path"]}') as stats:
+            await self.app(scope, receive, send_with_timing)
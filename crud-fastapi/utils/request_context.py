@@ -0,0 +1,59 @@
+# utils/request_context.py
+import contextvars
+import logging
+import time
+import uuid
+
+# Not `from logger import logger`: logger.py imports this module
+logger = logging.getLogger("crud_api")
+
+_request_id = contextvars.ContextVar("request_id", default=None)
+
+REQUEST_ID_HEADER = b"x-request-id"
+
+
+def get_request_id() -> str | None:
+    """Id of the request being handled in this context (also inside run_in_threadpool)."""
+    return _request_id.get()
+
+
+class RequestContextMiddleware:
+    """
+    Pure ASGI middleware:
+    - Takes the request id from X-Request-ID (or generates one) and echoes it in the response
+    - Makes it available to log records via get_request_id()
+    - Logs one line per request with method, path, status and duration_ms
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = dict(scope["headers"]).get(REQUEST_ID_HEADER, b"").decode("latin-1")[:64]
+        request_id = request_id or uuid.uuid4().hex
+        token = _request_id.set(request_id)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_with_request_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(REQUEST_ID_HEADER, request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            logger.info(
+                "%s %s -> %s in %.1f ms", scope["method"], scope["path"], status_code, duration_ms,
+                extra={"method": scope["method"], "path": scope["path"],
+                       "status_code": status_code, "duration_ms": round(duration_ms, 1)},
+            )
+            _request_id.reset(token)
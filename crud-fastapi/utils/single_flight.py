@@ -0,0 +1,46 @@
+# utils/single_flight.py
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key:
+    the first caller runs the function, every caller that arrives while it is
+    running gets the same result (or exception) instead of running it again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}  # key -> Future of the call in flight
+
+    def submit(self, key, fn, executor=None) -> Future:
+        """
+        Start `fn` for `key` unless a call is already in flight, and return its Future.
+        With an executor the call runs there; otherwise it runs in the calling thread.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future
+            future = Future()
+            self._calls[key] = future
+
+        if executor is not None:
+            executor.submit(self._run, key, fn, future)
+        else:
+            self._run(key, fn, future)
+        return future
+
+    def do(self, key, fn):
+        """Run (or join) the call for `key` and wait for its result."""
+        return self.submit(key, fn).result()
+
+    def _run(self, key, fn, future: Future):
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
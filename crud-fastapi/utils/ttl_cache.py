@@ -0,0 +1,92 @@
+# utils/ttl_cache.py
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Small thread-safe in-process cache:
+    - Entries expire `ttl` seconds after they are stored
+    - Least recently used entries are evicted once `max_size` is reached
+    - Optionally bounded by total size too: with `max_bytes`, values are weighed with len()
+      (e.g. bytes) and least recently used entries are evicted until the total fits
+    - Keeps hit / miss / eviction counters for monitoring
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 60.0, max_bytes: int | None = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _weight(self, value) -> int:
+        return len(value) if self.max_bytes is not None else 0
+
+    def _pop(self, key):
+        # Caller holds _lock
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._bytes -= self._weight(entry[1])
+        return entry
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at <= now:
+                # Expired entries count as a miss and are dropped right away
+                self._pop(key)
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: float | None = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        weight = self._weight(value)
+        if self.max_bytes is not None and weight > self.max_bytes:
+            # Could never fit; do not flush the whole cache for it
+            self.invalidate(key)
+            return
+        with self._lock:
+            self._pop(key)
+            self._data[key] = (expires_at, value)
+            self._bytes += weight
+            while len(self._data) > self.max_size or (self.max_bytes is not None and self._bytes > self.max_bytes):
+                self._pop(next(iter(self._data)))
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }